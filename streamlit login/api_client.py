@@ -0,0 +1,170 @@
+"""Pooled HTTP client for the FastAPI backend used by the Streamlit frontend.
+
+One ``requests.Session`` keeps connections alive across calls, every request
+has a timeout, and transient failures are retried with exponential backoff.
+Idempotent GETs can be served from a small per-user cache (for example a dict
+kept in ``st.session_state``) so Streamlit reruns do not hit the backend again.
+Expensive calls go through ``get_once``, which waits longer and only retries
+connection errors, so a slow request is never sent to the backend again.
+Large files go through the backend's chunked, resumable upload endpoints.
+"""
+import hashlib
+import os
+import sys
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+SLOW_TIMEOUT = (3.05, 120)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class BackendClient:
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.3, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # Connection errors are retried for any method; status-based retries only
+        # for idempotent methods so a POST is never replayed after it was processed.
+        self.session = self._make_session(retries, retries, backoff_factor, pool_size)
+        # For expensive requests: a read timeout means the backend is still working on it
+        self.single_attempt_session = self._make_session(retries, 0, backoff_factor, pool_size)
+
+    @staticmethod
+    def _make_session(retries, read_retries, backoff_factor, pool_size):
+        session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=read_retries,
+            status=read_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def get_once(self, path, timeout=SLOW_TIMEOUT, **kwargs):
+        """GET that may take a while (e.g. a first search); never re-sent after a read timeout."""
+        return self.single_attempt_session.get(self.url(path), timeout=timeout, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def cached_get(self, path, cache, ttl=60, **kwargs):
+        """GET ``path``, reusing a successful response stored in ``cache`` for ``ttl`` seconds."""
+        entry = cache.get(path)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        response = self.get(path, **kwargs)
+        if response.status_code == 200:
+            cache[path] = (now + ttl, response)
+        else:
+            cache.pop(path, None)
+        return response
+
+    @staticmethod
+    def invalidate(cache, path=None):
+        """Drop one cached path, or everything when ``path`` is None."""
+        if path is None:
+            cache.clear()
+        else:
+            cache.pop(path, None)
+
+    def upload_file(self, fileobj, filename, size=None, preprocess=False, chunk_size=UPLOAD_CHUNK_SIZE, max_resumes=5):
+        """Upload a seekable binary file through the resumable chunk endpoints.
+
+        Only one chunk is held in memory at a time. After a failed chunk the
+        client asks the backend how much it has and resumes from there.
+        Returns the backend's response to the final ``complete`` call.
+        """
+        created = self.post("/uploads", json={"filename": filename, "size": size})
+        if created.status_code != 200:
+            return created
+        upload_id = created.json()["upload_id"]
+        digest = hashlib.sha256()
+        offset = 0
+        resumes = 0
+        fileobj.seek(0)
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            try:
+                resp = self.put(
+                    f"/uploads/{upload_id}/chunk",
+                    params={"offset": offset},
+                    data=chunk,
+                    headers={"X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest()},
+                )
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                resp, ok = None, False
+            if ok:
+                digest.update(chunk)
+                offset += len(chunk)
+                continue
+            if resp is not None and resp.status_code not in (400, 409, 502, 503, 504):
+                return resp
+            resumes += 1
+            if resumes > max_resumes:
+                if resp is None:
+                    raise requests.ConnectionError(f"Upload {upload_id} failed after {max_resumes} resumes")
+                return resp
+            # Ask the backend where to continue; it may have stored the chunk already
+            received = self.get(f"/uploads/{upload_id}").json()["received"]
+            if received > offset:
+                fileobj.seek(offset)
+                digest.update(fileobj.read(received - offset))
+            offset = received
+            fileobj.seek(offset)
+        return self.post(
+            f"/uploads/{upload_id}/complete",
+            json={"sha256": digest.hexdigest(), "preprocess": preprocess},
+        )
+
+
+def main():
+    """Upload large files from disk: python api_client.py <file> [--preprocess] [--url URL]"""
+    args = sys.argv[1:]
+    preprocess = "--preprocess" in args
+    base_url = "http://127.0.0.1:8000"
+    if "--url" in args:
+        base_url = args[args.index("--url") + 1]
+        args.remove(base_url)
+    paths = [a for a in args if not a.startswith("--")]
+    if not paths:
+        print(main.__doc__)
+        sys.exit(2)
+    client = BackendClient(base_url, timeout=(3.05, 120))
+    for path in paths:
+        with open(path, "rb") as f:
+            resp = client.upload_file(f, os.path.basename(path), size=os.path.getsize(path), preprocess=preprocess)
+        if resp.status_code == 200:
+            print(f"Uploaded {path} as {resp.json().get('stored_as')}")
+        else:
+            print(f"Upload of {path} failed: {resp.status_code} {resp.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,34 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import pandas as pd
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+import codecs
 import json
+import csv
+from itertools import islice
 import os
+import re
 import uuid
 import hashlib
+import time
+import zlib
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-import sqlite3
+
+from migrations import migrate_engine
+from metrics import (
+    REGISTRY,
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    DB_QUERIES,
+    DB_QUERY_LATENCY,
+    DB_QUERIES_PER_REQUEST,
+    current_request_queries,
+    statement_type,
+)
 
 # -----------------------------
 # Database setup
@@ -22,6 +40,36 @@ Base = declarative_base()
 SessionLocal = sessionmaker(bind=engine)
 db = SessionLocal()
 
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _finish_query(conn, statement):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    kind = statement_type(statement)
+    DB_QUERIES.inc(kind)
+    DB_QUERY_LATENCY.observe(elapsed, kind)
+    queries = current_request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn, statement)
+
+
+@event.listens_for(engine, "handle_error")
+def _record_failed_query(exception_context):
+    # after_cursor_execute is skipped when a statement raises; pop its timer here
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    if conn.info.get("query_start"):
+        _finish_query(conn, exception_context.statement or "")
+
 # -----------------------------
 # Model
 # -----------------------------
@@ -31,7 +79,7 @@ class User(Base):
     username = Column(String, unique=True)
     password = Column(String)
     full_name = Column(String, default="")
-    email = Column(String, default="")
+    email = Column(String, default="", index=True)
     security_question = Column(String, default="")
     security_answer_hash = Column(String, default="")
     age_group = Column(String, default="")
@@ -46,43 +94,56 @@ class PasswordReset(Base):
     token = Column(String, unique=True, index=True)
     expires_at = Column(DateTime)
 
-Base.metadata.create_all(bind=engine)
+def init_db():
+    """Create missing tables and apply pending versioned migrations.
 
-def ensure_columns_sqlite():
-    """Ensure new columns exist on the users table for legacy DBs.
-    Uses a raw SQLite connection because PRAGMA/ALTER execution can be finicky via SQLAlchemy dialects.
+    Runs once per worker from the lifespan hook rather than at import time,
+    so importing this module stays cheap.
     """
-    try:
-        raw = engine.raw_connection()
-        try:
-            cur = raw.cursor()
-            cur.execute("PRAGMA table_info(users)")
-            existing = {row[1] for row in cur.fetchall()}  # column name at index 1
-            add_specs = [
-                ("full_name", "TEXT"),
-                ("email", "TEXT"),
-                ("security_question", "TEXT"),
-                ("security_answer_hash", "TEXT"),
-                ("age_group", "TEXT"),
-                ("language_preference", "TEXT"),
-                ("wellness_goals", "TEXT"),
-            ]
-            for name, coltype in add_specs:
-                if name not in existing:
-                    cur.execute(f"ALTER TABLE users ADD COLUMN {name} {coltype}")
-            raw.commit()
-        finally:
-            raw.close()
-    except Exception:
-        # Avoid crashing the app on startup; subsequent inserts may fail if schema is broken
-        pass
-
-ensure_columns_sqlite()
+    Base.metadata.create_all(bind=engine)
+    # No-op once the recorded version is current
+    migrate_engine(engine)
 
 # -----------------------------
 # API setup
 # -----------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    expire_stale_uploads()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-route request counts, latency and DB queries per request."""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    queries = [0]
+    token = current_request_queries.set(queries)
+    status = 500
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        current_request_queries.reset(token)
+        # Use the route template (e.g. /profile/{username}) to keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        HTTP_REQUESTS.inc(request.method, route, str(status))
+        HTTP_LATENCY.observe(elapsed, request.method, route)
+        DB_QUERIES_PER_REQUEST.observe(queries[0], route)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of request and database metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 class RegisterRequest(BaseModel):
     username: str
@@ -267,6 +328,558 @@ def forgot_password_request_token(request: ForgotPasswordEmailRequest):
     # In real systems, email the token. Here we return it for demo.
     return {"reset_token": token, "expires_at": expires_at.isoformat() + "Z"}
 
+# -----------------------------
+# Bulk user import
+# -----------------------------
+IMPORT_BATCH_SIZE = 1000
+
+
+def decoded_lines(f):
+    """Decode a binary upload one line at a time, so a bad byte only affects its own row."""
+    for i, raw in enumerate(f):
+        if i == 0 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        yield raw.decode("utf-8")
+
+
+def iter_import_rows(upload: UploadFile, fmt: str):
+    """Yield (row_number, record) pairs from a CSV or NDJSON upload without loading it whole.
+
+    If the upload cannot be decoded or parsed any further, a final error
+    record is yielded for the row where parsing stopped; the rows before it
+    are still imported.
+    """
+    lines = decoded_lines(upload.file)
+    row_number = 0
+    try:
+        if fmt == "csv":
+            for row_number, record in enumerate(csv.DictReader(lines), 1):
+                yield row_number, record
+        else:
+            for row_number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield row_number, {"__error__": f"Invalid JSON: {e}"}
+                    continue
+                if not isinstance(record, dict):
+                    record = {"__error__": "Expected a JSON object"}
+                yield row_number, record
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield row_number + 1, {"__error__": f"Could not parse upload: {e}"}
+
+
+def detect_import_format(upload: UploadFile, fmt: str | None) -> str:
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        name = (upload.filename or "").lower()
+        content_type = (upload.content_type or "").lower()
+        if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+            fmt = "ndjson"
+        else:
+            fmt = "csv"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Unsupported format, expected csv or ndjson")
+    return fmt
+
+
+def import_user_batch(batch, seen, errors):
+    """Validate one batch, skip existing usernames, and insert the rest in a single transaction."""
+    candidates = []
+    for row_number, record in batch:
+        if "__error__" in record:
+            errors.append({"row": row_number, "username": None, "error": record["__error__"]})
+            continue
+        username = str(record.get("username") or "").strip()
+        password = str(record.get("password") or "")
+        if not username or not password:
+            errors.append({"row": row_number, "username": username or None, "error": "username and password are required"})
+            continue
+        if username in seen:
+            errors.append({"row": row_number, "username": username, "error": "Duplicate username in upload"})
+            continue
+        seen.add(username)
+        candidates.append((row_number, username, password, record))
+
+    if not candidates:
+        return 0
+
+    existing = {
+        name for (name,) in db.query(User.username).filter(
+            User.username.in_([c[1] for c in candidates])
+        )
+    }
+    rows = []
+    row_numbers = []
+    for row_number, username, password, record in candidates:
+        if username in existing:
+            errors.append({"row": row_number, "username": username, "error": "Username already exists"})
+            continue
+        answer = record.get("security_answer")
+        rows.append({
+            "username": username,
+            "password": password,
+            "full_name": str(record.get("full_name") or ""),
+            "email": str(record.get("email") or ""),
+            "security_question": str(record.get("security_question") or ""),
+            "security_answer_hash": hash_text(str(answer)) if answer else "",
+        })
+        row_numbers.append(row_number)
+    if rows:
+        try:
+            db.execute(User.__table__.insert(), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for row_number, row in zip(row_numbers, rows):
+                errors.append({"row": row_number, "username": row["username"], "error": f"Insert failed: {e}"})
+            return 0
+    return len(rows)
+
+
+@app.post("/import/users")
+def import_users(file: UploadFile = File(...), format: str | None = None):
+    """Bulk import users from a CSV (header row) or NDJSON upload.
+
+    Rows are validated and inserted in chunked transactions of IMPORT_BATCH_SIZE;
+    rows that fail are reported individually and do not abort the import.
+    """
+    fmt = detect_import_format(file, format)
+    rows = iter_import_rows(file, fmt)
+    seen = set()
+    errors = []
+    total = 0
+    imported = 0
+    while True:
+        batch = list(islice(rows, IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+        total += len(batch)
+        imported += import_user_batch(batch, seen, errors)
+    errors.sort(key=lambda err: err["row"] or 0)
+    return {
+        "total_rows": total,
+        "imported": imported,
+        "failed": len(errors),
+        "errors": errors,
+    }
+
+# -----------------------------
+# Dataset downloads
+# -----------------------------
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATASET_FILES = {
+    "amazon_reviews": os.path.join(DATA_DIR, "preprocessed_reviews.csv"),
+    "sentiment_analysis": os.path.join(DATA_DIR, "preprocessed_sentiment_analysis.csv"),
+}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def dataset_path(name: str) -> str:
+    path = DATASET_FILES.get(name)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return path
+
+
+def iter_gzip_file(path: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    """Gzip a file on the fly, one chunk at a time."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def etag_matches(if_none_match: str | None, *etags: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag.removeprefix("W/") in candidates for etag in etags)
+
+
+def accepts_encoding(accept_encoding: str | None, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows ``coding`` (q-values respected, q=0 refuses)."""
+    weights = {}
+    for item in (accept_encoding or "").lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        if name == "x-" + coding:
+            name = coding
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = max(q, weights.get(name, 0.0))
+    # An explicit entry overrides the * wildcard
+    return weights.get(coding, weights.get("*", 0.0)) > 0
+
+
+@app.get("/datasets/{name}/download")
+def download_dataset(name: str, request: Request):
+    """Stream a preprocessed dataset from disk.
+
+    Supports Range requests and ETag revalidation. Clients that accept gzip
+    (and do not ask for a range) get the file compressed on the fly. Memory
+    use stays at one chunk whatever the file size.
+    """
+    path = dataset_path(name)
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    gzip_etag = f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}-gzip"'
+    filename = f"preprocessed_{name}.csv"
+
+    if etag_matches(request.headers.get("if-none-match"), etag, gzip_etag):
+        return Response(status_code=304, headers={"etag": etag, "vary": "Accept-Encoding"})
+
+    wants_gzip = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    if wants_gzip and "range" not in request.headers:
+        return StreamingResponse(
+            iter_gzip_file(path),
+            media_type="text/csv",
+            headers={
+                "content-encoding": "gzip",
+                "content-disposition": f'attachment; filename="{filename}"',
+                "etag": gzip_etag,
+                "vary": "Accept-Encoding",
+            },
+        )
+    # FileResponse reads in chunks (or hands the path to the server for
+    # zero-copy sending when supported) and handles Range/If-Range itself.
+    return FileResponse(
+        path,
+        filename=filename,
+        media_type="text/csv",
+        headers={"etag": etag, "vary": "Accept-Encoding"},
+    )
+
+MAX_PAGE_SIZE = 500
+
+
+@app.get("/datasets/{name}/rows")
+def browse_dataset(
+    name: str,
+    offset: int = 0,
+    limit: int = 50,
+    sentiment: str | None = None,
+    rating: float | None = None,
+    q: str | None = None,
+):
+    """Serve one page of a preprocessed dataset, optionally filtered.
+
+    When the dataset has a memory-mapped corpus store, unfiltered and
+    rating-filtered pages and ``q`` searches (over ``processed_text``) are
+    served from it, shared with every other worker through the page cache.
+    Otherwise unfiltered pages seek through a sparse row-offset index;
+    filtered pages use cached offsets of the matching rows, so deep pages
+    cost the same as the first one.
+    """
+    if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+    # Imported here: both pull in numpy/pandas, which would slow worker boot
+    from corpus_store import get_corpus_store
+    from dataset_index import ScanTooExpensive, read_page, read_filtered_page
+
+    path = dataset_path(name)
+    filters = {}
+    if sentiment:
+        filters["Sentiment"] = sentiment
+    if rating is not None:
+        filters["overall"] = float(rating)
+    store = get_corpus_store(path)
+    try:
+        if store is not None and not q and all(column in store.numeric_columns for column in filters):
+            header, rows, total = store.read_page(offset, limit, filters)
+        elif filters or q:
+            header, rows, total = read_filtered_page(path, offset, limit, filters, q, store=store)
+        else:
+            header, rows, total = read_page(path, offset, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Dataset has no {e.args[0]} column to filter on")
+    except ScanTooExpensive as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "dataset": name,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "columns": header,
+        "rows": [dict(zip(header, row)) for row in rows],
+    }
+
+# -----------------------------
+# Chunked, resumable uploads
+# -----------------------------
+UPLOADS_DIR = os.path.join(DATA_DIR, "uploads")
+UPLOAD_PARTIALS_DIR = os.path.join(DATA_DIR, ".upload_partials")
+PROCESSED_DIR = os.path.join(DATA_DIR, "processed")
+UPLOAD_EXTENSIONS = (".csv", ".json", ".ndjson", ".jsonl", ".txt", ".png", ".jpg", ".jpeg")
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+_upload_locks: dict[str, asyncio.Lock] = {}
+
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    size: int | None = None
+    sha256: str | None = None
+
+
+class CompleteUploadRequest(BaseModel):
+    sha256: str | None = None
+    preprocess: bool = False
+
+
+def upload_paths(upload_id: str) -> tuple[str, str]:
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    base = os.path.join(UPLOAD_PARTIALS_DIR, upload_id)
+    return base + ".part", base + ".json"
+
+
+def read_upload_meta(upload_id: str) -> dict:
+    _, meta_path = upload_paths(upload_id)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def write_upload_meta(upload_id: str, meta: dict):
+    _, meta_path = upload_paths(upload_id)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def upload_status(upload_id: str, meta: dict) -> dict:
+    part_path, _ = upload_paths(upload_id)
+    received = os.path.getsize(part_path) if os.path.exists(part_path) else meta.get("size_received", 0)
+    return dict(meta, upload_id=upload_id, received=received)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expire_stale_uploads(max_age: int = UPLOAD_EXPIRY_SECONDS) -> int:
+    """Delete partial files and metadata of uploads untouched for ``max_age`` seconds.
+
+    Covers abandoned uploads and the status files of finished ones, but leaves
+    uploads whose preprocessing is still queued or running. Returns the number
+    of uploads removed.
+    """
+    try:
+        names = os.listdir(UPLOAD_PARTIALS_DIR)
+    except FileNotFoundError:
+        return 0
+    cutoff = time.time() - max_age
+    upload_ids = {name.split(".", 1)[0] for name in names if UPLOAD_ID_PATTERN.match(name.split(".", 1)[0])}
+    removed = 0
+    for upload_id in upload_ids:
+        part_path, meta_path = upload_paths(upload_id)
+        paths = [part_path, meta_path, meta_path + ".tmp"]
+        try:
+            mtimes = [os.path.getmtime(path) for path in paths if os.path.exists(path)]
+            if not mtimes or max(mtimes) > cutoff:
+                continue
+            with open(meta_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("preprocess") in ("queued", "running"):
+                    continue
+        except FileNotFoundError:
+            pass  # Orphaned .part without metadata
+        except (OSError, ValueError):
+            continue
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        _upload_locks.pop(upload_id, None)
+        removed += 1
+    return removed
+
+
+def unique_upload_name(filename: str, upload_id: str) -> str:
+    """Keep the original name unless it is taken; never overwrite another upload."""
+    if not os.path.exists(os.path.join(UPLOADS_DIR, filename)):
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}-{upload_id[:8]}{ext}"
+
+
+def preprocess_upload(upload_id: str, path: str):
+    """Background task: run the text pipeline over a finished CSV/JSON upload."""
+    meta = read_upload_meta(upload_id)
+    meta["preprocess"] = "running"
+    write_upload_meta(upload_id, meta)
+    try:
+        # Heavy NLP imports stay out of the request path and worker boot
+        from text_preprocessing import TextPreprocessingPipeline
+        from preprocess_cache import PreprocessCache
+
+        os.makedirs(PROCESSED_DIR, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output_file = os.path.join(PROCESSED_DIR, f"{stem}_preprocessed.csv")
+        # Re-uploaded reviews are served from the shared preprocessing cache
+        cache = PreprocessCache()
+        pipeline = TextPreprocessingPipeline(cache=cache)
+        try:
+            if path.lower().endswith(".csv"):
+                result = pipeline.process_csv_stream(path, output_file)
+            else:
+                result = pipeline.process_json_stream(path, output_file)
+        finally:
+            cache.close()
+        meta["preprocess"] = "done" if result else "failed"
+        meta["preprocessed_file"] = result
+    except Exception as e:
+        meta["preprocess"] = "failed"
+        meta["preprocess_error"] = str(e)
+    write_upload_meta(upload_id, meta)
+
+
+@app.post("/uploads")
+def create_upload(request: CreateUploadRequest):
+    """Start a resumable upload and return its id"""
+    filename = os.path.basename(request.filename.replace("\\", "/")).strip()
+    if not filename or filename.startswith(".") or not filename.lower().endswith(UPLOAD_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file name or type")
+    expire_stale_uploads()
+    os.makedirs(UPLOAD_PARTIALS_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    part_path, _ = upload_paths(upload_id)
+    open(part_path, "wb").close()
+    meta = {
+        "filename": filename,
+        "size": request.size,
+        "sha256": request.sha256.lower() if request.sha256 else None,
+        "status": "uploading",
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+    write_upload_meta(upload_id, meta)
+    return upload_status(upload_id, meta)
+
+
+@app.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    """Upload progress; clients resume by sending the next chunk at ``received``"""
+    return upload_status(upload_id, read_upload_meta(upload_id))
+
+
+def write_chunk(f, digest, data: bytes):
+    f.write(data)
+    digest.update(data)
+
+
+@app.put("/uploads/{upload_id}/chunk")
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Append the raw request body at ``offset``.
+
+    The body is streamed to disk as it arrives. An optional ``X-Chunk-SHA256``
+    header is verified, and a mismatching chunk is discarded. File writes and
+    hashing run in the threadpool so the event loop keeps serving requests.
+    """
+    part_path, _ = upload_paths(upload_id)
+    expected_sha = request.headers.get("x-chunk-sha256")
+    lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        # Checked under the lock, so a chunk cannot land after complete_upload
+        meta = await run_in_threadpool(read_upload_meta, upload_id)
+        if meta.get("status") != "uploading":
+            raise HTTPException(status_code=409, detail="Upload already completed")
+        received = os.path.getsize(part_path)
+        if offset != received:
+            raise HTTPException(status_code=409, detail=f"Offset mismatch, expected {received}")
+        digest = hashlib.sha256()
+        f = await run_in_threadpool(open, part_path, "ab")
+        try:
+            async for data in request.stream():
+                await run_in_threadpool(write_chunk, f, digest, data)
+            end = f.tell()
+        finally:
+            await run_in_threadpool(f.close)
+        if expected_sha and digest.hexdigest() != expected_sha.lower():
+            os.truncate(part_path, received)
+            raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+        if meta.get("size") is not None and end > meta["size"]:
+            os.truncate(part_path, received)
+            raise HTTPException(status_code=400, detail="Upload exceeds declared size")
+    return {"upload_id": upload_id, "received": end}
+
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, request: CompleteUploadRequest, background_tasks: BackgroundTasks):
+    """Verify the upload and atomically move it into data/uploads"""
+    upload_paths(upload_id)
+    lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    # Same lock as upload_chunk: a chunk still being written finishes first
+    async with lock:
+        meta = await run_in_threadpool(finalize_upload, upload_id, request)
+    _upload_locks.pop(upload_id, None)
+
+    if meta.get("preprocess") == "queued":
+        background_tasks.add_task(preprocess_upload, upload_id, os.path.join(UPLOADS_DIR, meta["stored_as"]))
+    return upload_status(upload_id, meta)
+
+
+def finalize_upload(upload_id: str, request: CompleteUploadRequest) -> dict:
+    part_path, _ = upload_paths(upload_id)
+    meta = read_upload_meta(upload_id)
+    if meta.get("status") != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    size = os.path.getsize(part_path)
+    if meta.get("size") is not None and size != meta["size"]:
+        raise HTTPException(status_code=400, detail=f"Incomplete upload: {size} of {meta['size']} bytes")
+    sha256 = file_sha256(part_path)
+    expected = (request.sha256 or meta.get("sha256") or "").lower()
+    if expected and sha256 != expected:
+        raise HTTPException(status_code=400, detail="File checksum mismatch")
+
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    final_name = unique_upload_name(meta["filename"], upload_id)
+    final_path = os.path.join(UPLOADS_DIR, final_name)
+    # Same filesystem, so the file appears under its final name all at once.
+    # link() refuses to overwrite, which guards against a concurrent finalize.
+    try:
+        os.link(part_path, final_path)
+    except FileExistsError:
+        stem, ext = os.path.splitext(meta["filename"])
+        final_name = f"{stem}-{upload_id[:8]}{ext}"
+        final_path = os.path.join(UPLOADS_DIR, final_name)
+        os.link(part_path, final_path)
+    os.remove(part_path)
+
+    meta.update(status="complete", stored_as=final_name, sha256=sha256, size_received=size)
+    if request.preprocess and final_name.lower().endswith((".csv", ".json", ".ndjson", ".jsonl")):
+        meta["preprocess"] = "queued"
+    write_upload_meta(upload_id, meta)
+    return meta
+
 # Database export endpoints
 @app.get("/export/database")
 def download_database():
@@ -278,6 +891,9 @@ def download_database():
 @app.get("/export/users/csv")
 def export_users_csv():
     """Export users to CSV format"""
+    # pandas is only needed here; importing it lazily keeps worker boot fast
+    import pandas as pd
+
     try:
         df = pd.read_sql_query("SELECT * FROM users", db.bind.connect())
         csv_filename = "users_export.csv"
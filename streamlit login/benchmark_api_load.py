@@ -0,0 +1,399 @@
+"""Load test: auth, profile and export endpoints of the backend.
+
+Starts ``uvicorn backend:app`` on a free local port in a temporary directory,
+so the run gets a fresh ``users.db`` (and export files) that is deleted
+afterwards. It then drives one scenario at a time with async virtual users:
+
+- register:  every iteration registers a new user
+- login:     valid logins mixed with wrong passwords and unknown users
+- profile:   profile reads with a share of profile updates
+- forgot:    start -> verify -> reset -> login, or request_token -> reset
+- export:    the CSV / JSON / SQL / database export endpoints
+
+Users for the login, profile and forgot-password scenarios are seeded
+through ``/import/users`` before timing starts. Each scenario runs a fixed
+number of iterations with a fixed random seed, so two runs do the same work
+and their numbers can be compared. Expected rejections (a wrong password
+returning 400) are not errors; any other status or a transport failure is.
+
+Results are printed (or written with --output) as JSON: requests/sec, error
+rate and latency percentiles per scenario and per endpoint, the exception
+types the server logged, plus the run configuration and git revision. ``--baseline earlier.json`` adds the change
+in RPS and p95 against an earlier run.
+
+Usage: python benchmark_api_load.py [scenario ...] [--concurrency N]
+       [--iterations N] [--workers N] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEED = 1234
+SECURITY_QUESTION = "What is your favourite colour?"
+SECURITY_ANSWER = "green"
+EXCEPTION_LINE = re.compile(r"^([A-Za-z_][\w.]*(?:Error|Exception)):", re.MULTILINE)
+
+
+# -----------------------------
+# Server under test
+# -----------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir, port, log_file, workers=1):
+    """Run uvicorn with ``workdir`` as cwd, so users.db is created there."""
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend:app",
+            "--app-dir", HERE,
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=workdir,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def server_exceptions(log_path):
+    """Count the exception types in the server log (tracebacks of 500s)."""
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        log = f.read()
+    counts = {}
+    for name in EXCEPTION_LINE.findall(log):
+        counts[name] = counts.get(name, 0) + 1
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+async def wait_until_ready(base_url, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not start within {timeout:.0f}s")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+class Recorder:
+    """Latencies and outcomes per endpoint for one scenario."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, endpoint, seconds, status, ok):
+        entry = self.samples.setdefault(endpoint, {"latencies": [], "errors": 0, "status": {}})
+        entry["latencies"].append(seconds)
+        entry["status"][str(status)] = entry["status"].get(str(status), 0) + 1
+        if not ok:
+            entry["errors"] += 1
+
+
+async def call(client, recorder, endpoint, method, url, expect=(200,), **kwargs):
+    """Send one request and record it under ``endpoint``; returns the response or None."""
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        recorder.add(endpoint, time.perf_counter() - start, type(e).__name__, False)
+        return None
+    recorder.add(endpoint, time.perf_counter() - start, response.status_code, response.status_code in expect)
+    return response
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = [value * 1000 for value in latencies]
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ms) / count, 2) if count else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p90": round(percentile(ms, 90), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+    }
+
+
+def scenario_report(recorder, elapsed):
+    all_latencies = []
+    all_errors = 0
+    endpoints = {}
+    for endpoint, entry in sorted(recorder.samples.items()):
+        all_latencies.extend(entry["latencies"])
+        all_errors += entry["errors"]
+        endpoints[endpoint] = summarize(entry["latencies"], entry["errors"], elapsed)
+        endpoints[endpoint]["status"] = entry["status"]
+    report = summarize(all_latencies, all_errors, elapsed)
+    report["elapsed_s"] = round(elapsed, 3)
+    report["endpoints"] = endpoints
+    return report
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+# Each scenario is (setup, iteration). setup(client, config) seeds data and
+# returns shared state; iteration(client, recorder, state, vu, i, rng) runs one
+# unit of work for virtual user ``vu``. Seeded users are partitioned by
+# virtual user so concurrent password resets never touch the same account.
+def seeded_user(state, vu, i, concurrency):
+    per_vu = max(1, state["users"] // concurrency)
+    return f"lt_user_{vu + concurrency * (i % per_vu)}"
+
+
+async def seed_users(client, count):
+    lines = ["username,password,full_name,email,security_question,security_answer"]
+    for n in range(count):
+        lines.append(f"lt_user_{n},pw_{n},Load Test {n},lt_user_{n}@example.com,{SECURITY_QUESTION},{SECURITY_ANSWER}")
+    files = {"file": ("users.csv", "\n".join(lines).encode("utf-8"), "text/csv")}
+    response = await client.post("/import/users", files=files, timeout=120)
+    response.raise_for_status()
+    return {"users": count, "passwords": {f"lt_user_{n}": f"pw_{n}" for n in range(count)}}
+
+
+async def setup_seeded(client, config):
+    return await seed_users(client, max(config["concurrency"] * 4, 200))
+
+
+async def setup_none(client, config):
+    return {}
+
+
+async def register_iteration(client, recorder, state, vu, i, rng):
+    username = f"reg_{vu}_{i}"
+    await call(client, recorder, "POST /register", "POST", "/register", json={
+        "username": username,
+        "password": f"pw_{username}",
+        "full_name": "Storm User",
+        "email": f"{username}@example.com",
+        "security_question": SECURITY_QUESTION,
+        "security_answer": SECURITY_ANSWER,
+    })
+
+
+async def login_iteration(client, recorder, state, vu, i, rng):
+    username = seeded_user(state, vu, i, state["concurrency"])
+    roll = rng.random()
+    if roll < 0.80:
+        password, expect = state["passwords"][username], (200,)
+    elif roll < 0.95:
+        password, expect = "wrong-password", (400,)
+    else:
+        username, password, expect = f"nobody_{vu}_{i}", "x", (400,)
+    await call(client, recorder, "POST /login", "POST", "/login",
+               expect=expect, json={"username": username, "password": password})
+
+
+async def profile_iteration(client, recorder, state, vu, i, rng):
+    username = seeded_user(state, vu, i, state["concurrency"])
+    if rng.random() < 0.7:
+        await call(client, recorder, "GET /profile", "GET", f"/profile/{username}")
+    else:
+        await call(client, recorder, "PUT /profile", "PUT", f"/profile/{username}", json={
+            "full_name": f"Load Test {vu}-{i}",
+            "language_preference": rng.choice(["English", "Spanish", "French"]),
+            "wellness_goals": "Sleep better",
+        })
+
+
+async def forgot_iteration(client, recorder, state, vu, i, rng):
+    username = seeded_user(state, vu, i, state["concurrency"])
+    if rng.random() < 0.5:
+        response = await call(client, recorder, "POST /forgot_password/start", "POST",
+                              "/forgot_password/start", json={"username": username})
+        if response is None or response.status_code != 200:
+            return
+        response = await call(client, recorder, "POST /forgot_password/verify", "POST",
+                              "/forgot_password/verify",
+                              json={"username": username, "security_answer": SECURITY_ANSWER})
+    else:
+        response = await call(client, recorder, "POST /forgot_password/request_token", "POST",
+                              "/forgot_password/request_token", json={"email": f"{username}@example.com"})
+    if response is None or response.status_code != 200:
+        return
+    new_password = f"pw_{username}_{i}"
+    response = await call(client, recorder, "POST /forgot_password/reset", "POST", "/forgot_password/reset",
+                          json={"token": response.json()["reset_token"], "new_password": new_password})
+    if response is None or response.status_code != 200:
+        return
+    state["passwords"][username] = new_password
+    await call(client, recorder, "POST /login", "POST", "/login",
+               json={"username": username, "password": new_password})
+
+
+async def export_iteration(client, recorder, state, vu, i, rng):
+    path = rng.choice(["/export/users/csv", "/export/users/json", "/export/users/sql", "/export/database"])
+    await call(client, recorder, f"GET {path}", "GET", path)
+
+
+SCENARIOS = {
+    "register": (setup_none, register_iteration),
+    "login": (setup_seeded, login_iteration),
+    "profile": (setup_seeded, profile_iteration),
+    "forgot": (setup_seeded, forgot_iteration),
+    "export": (setup_seeded, export_iteration),
+}
+
+
+async def run_scenario(base_url, name, config):
+    setup, iteration = SCENARIOS[name]
+    concurrency = config["concurrency"]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        state = await setup(client, config)
+        state["concurrency"] = concurrency
+
+        # Warm-up, not recorded
+        warmup = Recorder()
+        for i in range(min(10, config["iterations"])):
+            await iteration(client, warmup, state, 0, -1 - i, random.Random(SEED))
+
+        recorder = Recorder()
+        per_vu = config["iterations"] // concurrency
+        extra = config["iterations"] % concurrency
+
+        async def virtual_user(vu):
+            rng = random.Random(SEED + vu)
+            for i in range(per_vu + (1 if vu < extra else 0)):
+                await iteration(client, recorder, state, vu, i, rng)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(vu) for vu in range(concurrency)))
+        return scenario_report(recorder, time.perf_counter() - start)
+
+
+def compare(report, baseline):
+    """Change in RPS and p95 latency per scenario against an earlier report."""
+    deltas = {}
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        deltas[name] = {
+            "rps_change_pct": round((result["rps"] / before["rps"] - 1) * 100, 1) if before["rps"] else None,
+            "p95_ms_before": before["latency_ms"]["p95"],
+            "p95_ms_after": result["latency_ms"]["p95"],
+            "error_rate_before": before["error_rate"],
+            "error_rate_after": result["error_rate"],
+        }
+    return deltas
+
+
+async def run(scenarios, config):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        # A fresh server (and database) per scenario keeps scenarios independent
+        for name in scenarios:
+            log_path = os.path.join(workdir, f"server-{name}.log")
+            with open(log_path, "wb") as log_file:
+                proc = start_server(workdir, port, log_file, config["workers"])
+                try:
+                    await wait_until_ready(base_url, proc)
+                    print(f"Running {name} ({config['iterations']} iterations, {config['concurrency']} users)...",
+                          file=sys.stderr)
+                    results[name] = await run_scenario(base_url, name, config)
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=10)
+            results[name]["server_exceptions"] = server_exceptions(log_path)
+            db_path = os.path.join(workdir, "users.db")
+            if os.path.exists(db_path):
+                os.remove(db_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend against a temporary database.")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users (default 20)")
+    parser.add_argument("--iterations", type=int, default=1000, help="iterations per scenario (default 1000)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (default 1)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    config = {
+        "concurrency": max(1, args.concurrency),
+        "iterations": max(1, args.iterations),
+        "workers": max(1, args.workers),
+        "seed": SEED,
+    }
+    scenarios = args.scenarios or list(SCENARIOS)
+    report = {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "scenarios": asyncio.run(run(scenarios, config)),
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["baseline"] = {"file": args.baseline, "deltas": compare(report, json.load(f))}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Report written to: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark: email lookup latency before and after the index migrations.
+
+Builds a temporary legacy-style users database (schema version 1, no email
+index), times the forgot-password email lookup, applies the pending
+migrations and times it again.
+
+Usage: python benchmark_email_lookup.py [num_users] [num_lookups]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from migrations import apply_migrations, get_schema_version
+
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR UNIQUE,
+    password VARCHAR,
+    full_name TEXT, email TEXT, security_question TEXT, security_answer_hash TEXT,
+    age_group TEXT, language_preference TEXT, wellness_goals TEXT
+);
+CREATE TABLE password_resets (
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR,
+    token VARCHAR,
+    expires_at DATETIME
+);
+PRAGMA user_version = 1;
+"""
+
+
+def build_database(path, num_users):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    batch = 50_000
+    for start in range(0, num_users, batch):
+        rows = [
+            (f"user{i}", "pw", f"User {i}", f"user{i}@example.com")
+            for i in range(start, min(start + batch, num_users))
+        ]
+        conn.executemany(
+            "INSERT INTO users (username, password, full_name, email) VALUES (?, ?, ?, ?)", rows
+        )
+    conn.commit()
+    return conn
+
+
+def time_lookups(conn, emails):
+    start = time.perf_counter()
+    for email in emails:
+        conn.execute("SELECT id, username FROM users WHERE email = ? LIMIT 1", (email,)).fetchone()
+    return (time.perf_counter() - start) / len(emails)
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print("=" * 60)
+    print(f"EMAIL LOOKUP BENCHMARK ({num_users:,} users, {num_lookups} lookups)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_users.db")
+        t0 = time.perf_counter()
+        conn = build_database(path, num_users)
+        print(f"Built database in {time.perf_counter() - t0:.1f}s")
+
+        rng = random.Random(42)
+        emails = [f"user{rng.randrange(num_users)}@example.com" for _ in range(num_lookups)]
+
+        before = time_lookups(conn, emails)
+        print(f"Schema v{get_schema_version(conn)}: {before * 1000:.3f} ms per lookup")
+
+        t0 = time.perf_counter()
+        applied = apply_migrations(conn)
+        print(f"Applied migrations {applied} in {time.perf_counter() - t0:.1f}s")
+
+        after = time_lookups(conn, emails)
+        print(f"Schema v{get_schema_version(conn)}: {after * 1000:.3f} ms per lookup")
+        print(f"Speedup: {before / after:.0f}x")
+
+        t0 = time.perf_counter()
+        apply_migrations(conn)
+        print(f"Startup check on current schema: {(time.perf_counter() - t0) * 1000:.3f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
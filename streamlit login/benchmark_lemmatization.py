@@ -0,0 +1,102 @@
+"""Benchmark: POS-aware lemmatization against the four-lookup WordNet chain.
+
+Runs the reviews through TextPreprocessingPipeline once per lemmatize mode:
+
+- chain:       v -> n -> a -> r WordNet lookups per token (current output)
+- wordnet_pos: one WordNet lookup per token, POS from the tokenization pass
+- spacy:       spaCy's lemma from the tokenization pass, no WordNet lookup
+
+Each mode is timed through both preprocess_text (one text at a time) and
+iter_preprocess (batched). The outputs of the POS-aware modes are then
+compared token by token with the chain output. Stopword filtering does not
+depend on the mode, so the token positions line up. The lemma changes are
+written to ``data/lemmatization_diff_<mode>.csv`` (old lemma, new lemma,
+count and an example review row), most frequent first.
+
+Usage: python benchmark_lemmatization.py [reviews_csv] [num_reviews]
+"""
+import csv
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+from text_preprocessing import LEMMATIZE_MODES, SPACY_AVAILABLE, TextPreprocessingPipeline
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def diff_outputs(baseline, candidate):
+    """Count (old, new) lemma changes, with the first row each change was seen in."""
+    changes = Counter()
+    examples = {}
+    changed_reviews = 0
+    compared_tokens = 0
+    for row, (old_tokens, new_tokens) in enumerate(zip(baseline, candidate)):
+        if old_tokens != new_tokens:
+            changed_reviews += 1
+        compared_tokens += max(len(old_tokens), len(new_tokens))
+        for old, new in zip(old_tokens, new_tokens):
+            if old != new:
+                changes[(old, new)] += 1
+                examples.setdefault((old, new), row)
+        # Only differs if tokenization itself differed; count the leftovers as changes
+        for extra in old_tokens[len(new_tokens):]:
+            changes[(extra, "")] += 1
+            examples.setdefault((extra, ""), row)
+        for extra in new_tokens[len(old_tokens):]:
+            changes[("", extra)] += 1
+            examples.setdefault(("", extra), row)
+    return changes, examples, changed_reviews, compared_tokens
+
+
+def write_diff(path, changes, examples):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["old_lemma", "new_lemma", "count", "example_row"])
+        for (old, new), count in changes.most_common():
+            writer.writerow([old, new, count, examples[(old, new)]])
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "amazon_reviews.csv")
+    num_reviews = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("=" * 60)
+    print("LEMMATIZATION BENCHMARK")
+    print("=" * 60)
+    texts = pd.read_csv(csv_path, usecols=["reviewText"], nrows=num_reviews)["reviewText"].tolist()
+    print(f"{len(texts)} reviews from {csv_path} (spaCy {'available' if SPACY_AVAILABLE else 'not available, NLTK tagger'})")
+
+    outputs = {}
+    for mode in LEMMATIZE_MODES:
+        pipeline = TextPreprocessingPipeline(lemmatize_mode=mode)
+        pipeline.preprocess_text(texts[0])  # warm-up
+        single, single_time = timed(lambda: [pipeline.preprocess_text(text, return_as_list=True) for text in texts])
+        batched, batched_time = timed(lambda: list(pipeline.iter_preprocess(texts, return_as_list=True)))
+        outputs[mode] = single
+        same = "same" if single == batched else "DIFFERENT"
+        print(f"{mode:>12}: preprocess_text {len(texts) / single_time:8,.0f} reviews/sec | "
+              f"iter_preprocess {len(texts) / batched_time:8,.0f} reviews/sec ({same} output)")
+
+    for mode in LEMMATIZE_MODES[1:]:
+        changes, examples, changed_reviews, compared_tokens = diff_outputs(outputs["chain"], outputs[mode])
+        path = os.path.join(DATA_DIR, f"lemmatization_diff_{mode}.csv")
+        write_diff(path, changes, examples)
+        changed_tokens = sum(changes.values())
+        print(f"\n{mode} vs chain: {changed_reviews}/{len(texts)} reviews and "
+              f"{changed_tokens}/{compared_tokens} tokens changed -> {path}")
+        for (old, new), count in changes.most_common(15):
+            print(f"  {old or '-':>15} -> {new or '-':<15} {count:6d}")
+
+
+if __name__ == "__main__":
+    main()
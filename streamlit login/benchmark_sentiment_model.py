@@ -0,0 +1,61 @@
+"""Benchmark: sentiment classifier throughput and accuracy.
+
+Trains a model on a stratified split of the labelled sentiment CSV, reports
+holdout accuracy next to the lexicon baseline (quick_sentiment), then times
+batched inference over the Amazon reviews' processed_text, repeated to the
+requested corpus size. No artifact is written.
+
+Usage: python benchmark_sentiment_model.py [num_reviews] [batch_size]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from insight_helpers import quick_sentiment
+from sentiment_model import DATA_DIR, build_pipeline, evaluate, load_labelled, predict
+
+
+def main():
+    num_reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    print("=" * 60)
+    print("SENTIMENT MODEL BENCHMARK")
+    print("=" * 60)
+
+    texts, labels = load_labelled()
+    x_train, x_test, y_train, y_test = train_test_split(
+        texts, labels, test_size=0.25, random_state=42, stratify=labels
+    )
+    start = time.perf_counter()
+    model = build_pipeline().fit(x_train, y_train)
+    print(f"Trained on {len(x_train)} rows in {time.perf_counter() - start:.2f}s")
+
+    accuracy = evaluate(model, x_test, y_test)
+    lexicon = [quick_sentiment(text)[0] for text in x_test]
+    lexicon_accuracy = sum(p == y for p, y in zip(lexicon, y_test)) / len(y_test)
+    print(f"Holdout accuracy ({len(y_test)} rows): model {accuracy:.3f}, lexicon {lexicon_accuracy:.3f}")
+
+    reviews = pd.read_csv(os.path.join(DATA_DIR, "preprocessed_reviews.csv"), usecols=["processed_text"])
+    base = reviews["processed_text"].fillna("").astype(str).tolist()
+    corpus = (base * (num_reviews // len(base) + 1))[:num_reviews]
+
+    predict(corpus[:batch_size], model=model, batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    predictions = predict(corpus, model=model, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Batched inference: {len(predictions):,} reviews in {elapsed:.2f}s "
+          f"({len(predictions) / elapsed:,.0f} reviews/sec, batch size {batch_size:,})")
+
+    start = time.perf_counter()
+    for text in corpus[:2_000]:
+        model.predict([text])
+    per_row = (time.perf_counter() - start) / 2_000
+    print(f"Row-at-a-time inference: {1 / per_row:,.0f} reviews/sec")
+
+
+if __name__ == "__main__":
+    main()
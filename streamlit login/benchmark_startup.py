@@ -0,0 +1,122 @@
+"""Benchmark: backend worker cold start.
+
+Runs ``python -X importtime -c "import backend"`` in a fresh interpreter and
+reports the total import time plus the slowest top-level modules, then times
+the lifespan schema work (create_all + migrations) against a temporary
+database. Exits non-zero when the boot budget is exceeded.
+
+Usage: python benchmark_startup.py [budget_seconds] [top_n]
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports():
+    """Return (traced_wall_seconds, total_us, [(cumulative_us, self_us, module)]).
+
+    ``total_us`` is the cumulative import time of ``backend``; the module list
+    holds its direct imports so the cost can be attributed per dependency.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing backend failed:\n{proc.stderr[-2000:]}")
+
+    # Output is post-order: children are listed before the parent that imported them
+    modules = []
+    pending = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # Nesting is shown as two extra spaces per level after the pipe
+        depth = (len(indent) - 1) // 2
+        if depth == 1:
+            pending.append((int(cumulative_us), int(self_us), name))
+        elif depth == 0:
+            if name == "backend":
+                total_us = int(cumulative_us)
+                modules = pending
+            pending = []
+    return wall, total_us, modules
+
+
+def measure_boot_wall(runs=3):
+    """Median wall time of a fresh interpreter importing backend (no tracing overhead)."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import backend"], cwd=HERE, check=True)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def measure_schema_init():
+    """Time init_db() as run by the lifespan hook, on a fresh and an up-to-date DB."""
+    with tempfile.TemporaryDirectory() as tmp:
+        code = (
+            "import time, backend\n"
+            "t = time.perf_counter(); backend.init_db(); first = time.perf_counter() - t\n"
+            "t = time.perf_counter(); backend.init_db(); again = time.perf_counter() - t\n"
+            "print(first, again)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=HERE + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=tmp, env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"init_db failed:\n{proc.stderr[-2000:]}")
+        first, again = (float(x) for x in proc.stdout.split())
+        return first, again
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    top_n = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    print("=" * 60)
+    print("BACKEND STARTUP BENCHMARK")
+    print("=" * 60)
+
+    _, total_us, modules = measure_imports()
+    print(f"import backend (cumulative, -X importtime): {total_us / 1e6:.3f}s")
+    print("\nSlowest direct imports of backend (cumulative):")
+    for cumulative_us, self_us, name in sorted(modules, reverse=True)[:top_n]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+    heavy = [name for _, _, name in modules if name.split(".")[0] in ("pandas", "numpy")]
+    if heavy:
+        print(f"\nWARNING: heavy modules imported at startup: {', '.join(heavy)}")
+
+    first, again = measure_schema_init()
+    print(f"\nLifespan init_db on new DB: {first * 1000:.1f} ms")
+    print(f"Lifespan init_db on current DB: {again * 1000:.1f} ms")
+
+    wall = measure_boot_wall()
+    print(f"Interpreter + import backend (median wall): {wall:.3f}s")
+
+    boot = wall + again
+    print(f"\nEstimated worker boot: {boot:.3f}s (budget {budget:.3f}s)")
+    if boot > budget:
+        print("FAIL: boot budget exceeded")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Read-only, memory-mapped column store for the preprocessed review corpus.
+
+``python corpus_store.py [preprocessed_csv]`` converts the CSV into a directory
+next to it (``data/corpus/<name>/``):
+
+- ``meta.json``: columns, row count and the source CSV's size and mtime
+- ``<i>.offsets`` / ``<i>.text``: for every column, ``rows + 1`` uint64 byte
+  offsets into a UTF-8 blob holding the exact CSV field values
+- ``<i>.num``: float64 values (NaN when missing) for numeric columns, so
+  ratings, timestamps and vote counts can be filtered and aggregated with NumPy
+
+Readers map the files rather than loading them. Every Streamlit session and
+backend worker on the machine is served from the same pages in the OS page
+cache, so there is one physical copy of the corpus however many readers it
+has. The store is never modified in place. A rebuild writes a new directory
+and renames it over the old one, and readers that still have the old files
+mapped keep a consistent view.
+"""
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+from array import array
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS_DIR = os.path.join(DATA_DIR, "corpus")
+STORE_VERSION = 1
+BUILD_CHUNK_SIZE = 50_000
+
+
+def store_path(csv_path):
+    return os.path.join(CORPUS_DIR, os.path.splitext(os.path.basename(csv_path))[0])
+
+
+def _numeric_columns(chunk):
+    """Columns whose non-empty values all parse as numbers."""
+    import pandas as pd
+
+    numeric = []
+    for column in chunk.columns:
+        values = chunk[column][chunk[column] != ""]
+        if len(values) and pd.to_numeric(values, errors="coerce").notna().all():
+            numeric.append(column)
+    return numeric
+
+
+def build_corpus_store(csv_path, chunksize=BUILD_CHUNK_SIZE):
+    """Convert ``csv_path`` into a memory-mapped store in one chunked pass."""
+    # pandas is only needed to build the store; readers stay on numpy
+    import pandas as pd
+
+    st = os.stat(csv_path)
+    path = store_path(csv_path)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = None
+    numeric = []
+    files = []
+    ends = []
+    rows = 0
+    try:
+        chunks = pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunksize)
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                numeric = _numeric_columns(chunk)
+                for i, column in enumerate(columns):
+                    handles = {
+                        "offsets": open(os.path.join(tmp_path, f"{i}.offsets"), "wb"),
+                        "text": open(os.path.join(tmp_path, f"{i}.text"), "wb"),
+                    }
+                    if column in numeric:
+                        handles["num"] = open(os.path.join(tmp_path, f"{i}.num"), "wb")
+                    handles["offsets"].write(np.zeros(1, dtype="<u8").tobytes())
+                    files.append(handles)
+                    ends.append(0)
+            for i, column in enumerate(columns):
+                encoded = [value.encode("utf-8") for value in chunk[column]]
+                lengths = np.fromiter(map(len, encoded), dtype="<u8", count=len(encoded))
+                offsets = ends[i] + np.cumsum(lengths, dtype="<u8")
+                files[i]["text"].write(b"".join(encoded))
+                files[i]["offsets"].write(offsets.tobytes())
+                if len(offsets):
+                    ends[i] = int(offsets[-1])
+                if "num" in files[i]:
+                    values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype="<f8")
+                    files[i]["num"].write(values.tobytes())
+            rows += len(chunk)
+            print(f"Stored {rows} rows...")
+    finally:
+        for handles in files:
+            for f in handles.values():
+                f.close()
+
+    meta = {
+        "version": STORE_VERSION,
+        "columns": columns or [],
+        "numeric_columns": numeric,
+        "rows": rows,
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap directories; processes that still map the old files keep them until they close
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+def _map_bytes(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _map_array(path, dtype, count):
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class CorpusStore:
+    def __init__(self, path, meta):
+        self.path = path
+        self.columns = meta["columns"]
+        self.numeric_columns = meta["numeric_columns"]
+        self.rows = meta["rows"]
+        self.source_size = meta["source_size"]
+        self.source_mtime_ns = meta["source_mtime_ns"]
+        self._offsets = {}
+        self._text = {}
+        self._numeric = {}
+        for i, column in enumerate(self.columns):
+            base = os.path.join(path, str(i))
+            self._offsets[column] = _map_array(base + ".offsets", "<u8", self.rows + 1)
+            self._text[column] = _map_bytes(base + ".text")
+            if column in self.numeric_columns:
+                self._numeric[column] = _map_array(base + ".num", "<f8", self.rows)
+
+    def numeric(self, column):
+        """Read-only float64 array over a numeric column (raises KeyError otherwise)."""
+        return self._numeric[column]
+
+    def text(self, column, row):
+        offsets = self._offsets[column]
+        return self._text[column][int(offsets[row]):int(offsets[row + 1])].decode("utf-8")
+
+    def texts(self, column, rows):
+        """Field values of ``column`` for the given row numbers."""
+        offsets = self._offsets[column]
+        blob = self._text[column]
+        return [blob[int(offsets[r]):int(offsets[r + 1])].decode("utf-8") for r in rows]
+
+    def iter_texts(self, column, batch_size=10_000):
+        """Yield every value of ``column`` in order, one batch of rows at a time."""
+        for start in range(0, self.rows, batch_size):
+            yield from self.texts(column, range(start, min(start + batch_size, self.rows)))
+
+    def records(self, rows, columns=None):
+        """Rows as lists of CSV field strings, in ``columns`` order (all by default)."""
+        rows = list(rows)
+        values = [self.texts(column, rows) for column in (columns or self.columns)]
+        return [list(record) for record in zip(*values)]
+
+    def frame(self, rows, columns=None):
+        import pandas as pd
+
+        columns = columns or self.columns
+        return pd.DataFrame({column: self.texts(column, rows) for column in columns}, columns=columns)
+
+    def matching_rows(self, filters):
+        """Row numbers where every numeric column equals its value in ``filters``."""
+        mask = np.ones(self.rows, dtype=bool)
+        for column, expected in filters.items():
+            mask &= self.numeric(column) == float(expected)
+        return np.flatnonzero(mask)
+
+    def search_rows(self, column, needle):
+        """Row numbers whose ``column`` value contains ``needle`` (case-sensitive).
+
+        A byte search over the mapped blob; match positions are mapped to rows
+        in one vectorized step.
+        """
+        offsets = self._offsets[column]
+        blob = self._text[column]
+        needle = needle.encode("utf-8")
+        positions = array("q")
+        pos = blob.find(needle) if needle else -1
+        while pos != -1:
+            positions.append(pos)
+            pos = blob.find(needle, pos + 1)
+        positions = np.frombuffer(positions, dtype=np.int64)
+        rows = np.searchsorted(offsets, positions, side="right") - 1
+        # Drop matches that run past the end of their field into the next one
+        rows = rows[positions + len(needle) <= offsets[rows + 1]]
+        return np.unique(rows)
+
+    def read_page(self, offset, limit, filters=None):
+        """Return (header, rows, total) like ``dataset_index.read_page``."""
+        if filters:
+            matches = self.matching_rows(filters)
+            selected, total = matches[offset:offset + max(limit, 0)], len(matches)
+        else:
+            selected, total = range(min(offset, self.rows), min(offset + max(limit, 0), self.rows)), self.rows
+        return self.columns, self.records(selected), total
+
+
+def read_corpus_store(csv_path):
+    """Open the store for ``csv_path``, or None if it is missing or older than the CSV."""
+    path = store_path(csv_path)
+    try:
+        st = os.stat(csv_path)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (
+            meta.get("version") != STORE_VERSION
+            or meta.get("source_size") != st.st_size
+            or meta.get("source_mtime_ns") != st.st_mtime_ns
+        ):
+            return None
+        return CorpusStore(path, meta)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+_stores = {}
+_lock = threading.Lock()
+
+
+def get_corpus_store(csv_path):
+    """Shared store for ``csv_path``, opened once per process; None if not built or stale."""
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    with _lock:
+        cached = _stores.get(csv_path)
+    if cached and cached.source_size == st.st_size and cached.source_mtime_ns == st.st_mtime_ns:
+        return cached
+    store = read_corpus_store(csv_path)
+    with _lock:
+        if store is None:
+            _stores.pop(csv_path, None)
+        else:
+            _stores[csv_path] = store
+    return store
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "preprocessed_reviews.csv")
+    print("=" * 60)
+    print("BUILDING CORPUS STORE")
+    print("=" * 60)
+    path = build_corpus_store(csv_path)
+    store = read_corpus_store(csv_path)
+    print(f"Stored {store.rows} rows x {len(store.columns)} columns -> {path}")
+    print(f"Numeric columns: {', '.join(store.numeric_columns) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
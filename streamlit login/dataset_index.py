@@ -0,0 +1,312 @@
+"""Random access to pages of large preprocessed CSVs.
+
+A sparse row-offset index (the byte offset of every ``stride``-th record) is
+stored next to each CSV as ``<name>.rowidx``, so any page is one seek plus at
+most ``stride`` skipped records, whether it is page 1 or page 10,000.
+Filtered browsing scans the file once per distinct filter and caches the byte
+offsets of the matching records, after which every page is direct seeks.
+Concurrent requests for the same filter wait for one scan instead of starting
+their own, and the cache is bounded by bytes. When the CSV has a corpus store,
+text searches run over its ``processed_text`` blob instead. A full scan of a
+CSV larger than ``MAX_SCAN_BYTES`` is refused with ScanTooExpensive.
+
+Record boundaries are found on raw bytes by quote parity, which matches how
+the csv module treats quoted fields containing newlines.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from json_ingest import detect_text_column
+
+DEFAULT_STRIDE = 1000
+FILTER_CACHE_BYTES = 64 * 1024 * 1024
+MAX_SCAN_BYTES = 256 * 1024 * 1024
+SEARCH_COLUMN = "processed_text"
+INDEX_VERSION = 1
+
+
+class ScanTooExpensive(Exception):
+    """A filter would need a full scan of a CSV larger than MAX_SCAN_BYTES."""
+
+
+def iter_records(f, start):
+    """Yield (byte_offset, raw_bytes) for each non-blank CSV record from ``start``."""
+    f.seek(start)
+    pos = start
+    record_start = start
+    parts = []
+    quotes = 0
+    for line in f:
+        parts.append(line)
+        quotes += line.count(b'"')
+        pos += len(line)
+        if quotes % 2 == 0:
+            raw = b"".join(parts)
+            if raw.strip():
+                yield record_start, raw
+            parts = []
+            quotes = 0
+            record_start = pos
+    if parts and b"".join(parts).strip():
+        yield record_start, b"".join(parts)
+
+
+def parse_record(raw):
+    return next(csv.reader(io.StringIO(raw.decode("utf-8", errors="replace"))), [])
+
+
+class RowIndex:
+    def __init__(self, header, rows, stride, offsets, size, mtime_ns):
+        self.header = header
+        self.rows = rows
+        self.stride = stride
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+
+def index_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".rowidx"
+
+
+def build_row_index(csv_path, stride=DEFAULT_STRIDE):
+    """Scan ``csv_path`` once and write its sparse row-offset index."""
+    st = os.stat(csv_path)
+    offsets = array("q")
+    rows = 0
+    with open(csv_path, "rb") as f:
+        records = iter_records(f, 0)
+        first = next(records, None)
+        header = parse_record(first[1]) if first else []
+        for start, _ in records:
+            if rows % stride == 0:
+                offsets.append(start)
+            rows += 1
+    meta = {
+        "version": INDEX_VERSION,
+        "header": header,
+        "rows": rows,
+        "stride": stride,
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+    }
+    path = index_path(csv_path)
+    # Unique temp name, so concurrent builds (e.g. other workers) never replace each other's file
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            offsets.tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return RowIndex(header, rows, stride, offsets, st.st_size, st.st_mtime_ns)
+
+
+def read_row_index(csv_path):
+    """Load the index for ``csv_path``, or None if it is missing or stale."""
+    try:
+        st = os.stat(csv_path)
+        with open(index_path(csv_path), "rb") as f:
+            meta = json.loads(f.readline())
+            offsets = array("q")
+            offsets.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    if (
+        meta.get("version") != INDEX_VERSION
+        or meta.get("source_size") != st.st_size
+        or meta.get("source_mtime_ns") != st.st_mtime_ns
+    ):
+        return None
+    return RowIndex(meta["header"], meta["rows"], meta["stride"], offsets, st.st_size, st.st_mtime_ns)
+
+
+_index_cache = {}
+_filter_cache = OrderedDict()
+_filter_cache_bytes = 0
+_filter_builds = {}
+_lock = threading.Lock()
+
+
+def get_row_index(csv_path):
+    """Row index for ``csv_path``, cached per process and rebuilt when the file changes."""
+    st = os.stat(csv_path)
+    with _lock:
+        cached = _index_cache.get(csv_path)
+        if cached and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+            return cached
+        # Held for the build, so simultaneous first requests build the index once
+        index = read_row_index(csv_path) or build_row_index(csv_path)
+        _index_cache[csv_path] = index
+    return index
+
+
+def read_page(csv_path, offset, limit):
+    """Return (header, rows, total) for rows ``offset`` .. ``offset + limit`` of the CSV."""
+    index = get_row_index(csv_path)
+    if offset >= index.rows or limit <= 0:
+        return index.header, [], index.rows
+    block = offset // index.stride
+    skip = offset - block * index.stride
+    rows = []
+    with open(csv_path, "rb") as f:
+        for _, raw in iter_records(f, index.offsets[block]):
+            if skip:
+                skip -= 1
+                continue
+            rows.append(parse_record(raw))
+            if len(rows) >= limit:
+                break
+    return index.header, rows, index.rows
+
+
+def _make_predicate(header, filters, q):
+    """Build a row predicate; raises KeyError naming a missing column."""
+    checks = []
+    for column, expected in filters.items():
+        position = header.index(column) if column in header else None
+        if position is None:
+            raise KeyError(column)
+        if isinstance(expected, float):
+            def check(row, position=position, expected=expected):
+                try:
+                    return float(row[position]) == expected
+                except (ValueError, IndexError):
+                    return False
+        else:
+            expected = str(expected).strip().lower()
+
+            def check(row, position=position, expected=expected):
+                return position < len(row) and row[position].strip().lower() == expected
+        checks.append(check)
+    if q:
+        needle = q.lower()
+        text_column = detect_text_column(header)
+        search_columns = [c for c in (text_column, "processed_text") if c in header]
+        positions = [header.index(c) for c in search_columns]
+
+        def check_text(row):
+            return any(p < len(row) and needle in row[p].lower() for p in positions)
+        checks.append(check_text)
+    return lambda row: all(check(row) for check in checks)
+
+
+def _nbytes(matches):
+    # array('q') of byte offsets or a NumPy array of row numbers
+    return matches.nbytes if hasattr(matches, "nbytes") else len(matches) * matches.itemsize
+
+
+def _cache_matches(key, matches):
+    global _filter_cache_bytes
+    # A result larger than the whole budget is returned but not kept
+    if _nbytes(matches) <= FILTER_CACHE_BYTES:
+        _filter_cache[key] = matches
+        _filter_cache_bytes += _nbytes(matches)
+    while _filter_cache_bytes > FILTER_CACHE_BYTES:
+        _, evicted = _filter_cache.popitem(last=False)
+        _filter_cache_bytes -= _nbytes(evicted)
+
+
+def cached_matches(key, build):
+    """Return ``build()`` for ``key`` from the cache, building it once per process.
+
+    Requests that arrive while another one is building the same key wait for
+    its result instead of repeating the scan.
+    """
+    with _lock:
+        cached = _filter_cache.get(key)
+        if cached is not None:
+            _filter_cache.move_to_end(key)
+            return cached
+        future = _filter_builds.get(key)
+        owner = future is None
+        if owner:
+            future = _filter_builds[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        matches = build()
+    except BaseException as e:
+        with _lock:
+            _filter_builds.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _lock:
+        _filter_builds.pop(key, None)
+        _cache_matches(key, matches)
+    future.set_result(matches)
+    return matches
+
+
+def _scan_offsets(csv_path, index, filters, q):
+    if index.size > MAX_SCAN_BYTES:
+        raise ScanTooExpensive(
+            f"Filtering {os.path.basename(csv_path)} needs a full scan of {index.size / 1e6:,.0f} MB; "
+            f"build its corpus store (python corpus_store.py {csv_path}) to search it"
+        )
+    predicate = _make_predicate(index.header, filters, q)
+    # Records that cannot contain the search text skip CSV parsing
+    needle = (q or "").lower().encode("utf-8")
+    prefilter = needle if needle and needle.isascii() and b'"' not in needle else None
+    matches = array("q")
+    with open(csv_path, "rb") as f:
+        records = iter_records(f, 0)
+        next(records, None)  # header
+        for start, raw in records:
+            if prefilter is not None and prefilter not in raw.lower():
+                continue
+            if predicate(parse_record(raw)):
+                matches.append(start)
+    return matches
+
+
+def _store_searchable(store, filters, q):
+    return (
+        store is not None
+        and q
+        and SEARCH_COLUMN in store.columns
+        and all(column in store.numeric_columns for column in filters)
+    )
+
+
+def _store_matches(store, filters, q):
+    rows = store.search_rows(SEARCH_COLUMN, q.lower())
+    for column, expected in filters.items():
+        rows = rows[store.numeric(column)[rows] == float(expected)]
+    return rows
+
+
+def filtered_offsets(csv_path, filters, q=None):
+    """Byte offsets of all records matching ``filters``/``q``, cached per file version."""
+    index = get_row_index(csv_path)
+    key = (csv_path, index.size, index.mtime_ns, tuple(sorted(filters.items())), (q or "").lower())
+    return index, cached_matches(key, lambda: _scan_offsets(csv_path, index, filters, q))
+
+
+def read_filtered_page(csv_path, offset, limit, filters, q=None, store=None):
+    """Return (header, rows, total_matches) for one page of filtered rows.
+
+    With a corpus ``store`` for the CSV, ``q`` is matched against its
+    ``processed_text`` column without scanning the CSV.
+    """
+    if _store_searchable(store, filters, q):
+        key = ("store", csv_path, store.source_size, store.source_mtime_ns, tuple(sorted(filters.items())), q.lower())
+        matches = cached_matches(key, lambda: _store_matches(store, filters, q))
+        return store.columns, store.records(matches[offset:offset + max(limit, 0)]), len(matches)
+    index, matches = filtered_offsets(csv_path, filters, q)
+    rows = []
+    with open(csv_path, "rb") as f:
+        for start in matches[offset:offset + max(limit, 0)]:
+            _, raw = next(iter_records(f, start))
+            rows.append(parse_record(raw))
+    return index.header, rows, len(matches)
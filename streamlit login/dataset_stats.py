@@ -0,0 +1,118 @@
+"""Precomputed full-dataset statistics stored next to preprocessed CSVs.
+
+The preprocessing scripts write ``<name>.stats.json`` right after saving a
+dataset, so the frontend can show accurate totals without re-reading the CSV.
+If the sidecar is missing or older than the CSV it is rebuilt with a chunked
+pass that only loads the columns it needs.
+"""
+import json
+import os
+
+import pandas as pd
+
+STATS_VERSION = 2
+LABEL_COLUMN = "Sentiment"
+
+
+def sidecar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".stats.json"
+
+
+class StatsAccumulator:
+    """Running sums so statistics can be built from a whole frame or from chunks."""
+
+    def __init__(self, text_column):
+        self.text_column = text_column
+        self.rows = 0
+        self.original_chars = 0
+        self.original_count = 0
+        self.processed_chars = 0
+        self.processed_count = 0
+        self.label_counts = {}
+        self.has_labels = False
+
+    def update(self, df):
+        # Empty strings come back from a CSV as NaN; count both as length 0 so
+        # in-memory frames and re-read CSVs give the same averages
+        self.rows += len(df)
+        if self.text_column in df.columns:
+            lengths = df[self.text_column].fillna("").astype(str).str.len()
+            self.original_chars += int(lengths.sum())
+            self.original_count += int(lengths.count())
+        if "processed_text" in df.columns:
+            lengths = df["processed_text"].fillna("").astype(str).str.len()
+            self.processed_chars += int(lengths.sum())
+            self.processed_count += int(lengths.count())
+        if LABEL_COLUMN in df.columns:
+            self.has_labels = True
+            for label, count in df[LABEL_COLUMN].value_counts().items():
+                self.label_counts[str(label)] = self.label_counts.get(str(label), 0) + int(count)
+
+    def result(self):
+        return {
+            "rows": self.rows,
+            "text_column": self.text_column,
+            "avg_original_length": self.original_chars / self.original_count if self.original_count else 0.0,
+            "avg_processed_length": self.processed_chars / self.processed_count if self.processed_count else 0.0,
+            "label_counts": self.label_counts if self.has_labels else None,
+        }
+
+
+def compute_stats(df, text_column="reviewText"):
+    """Statistics for an in-memory preprocessed DataFrame."""
+    acc = StatsAccumulator(text_column)
+    acc.update(df)
+    return acc.result()
+
+
+def compute_stats_from_csv(csv_path, text_column="reviewText", chunksize=100_000):
+    """Statistics for a preprocessed CSV, read in chunks of the needed columns only."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    wanted = [c for c in (text_column, "processed_text", LABEL_COLUMN) if c in header]
+    acc = StatsAccumulator(text_column)
+    for chunk in pd.read_csv(csv_path, usecols=wanted, chunksize=chunksize):
+        acc.update(chunk)
+    return acc.result()
+
+
+def write_stats(csv_path, stats):
+    """Write stats for ``csv_path`` to its sidecar, stamped with the CSV's size and mtime."""
+    st = os.stat(csv_path)
+    payload = dict(stats, version=STATS_VERSION, source_size=st.st_size, source_mtime=st.st_mtime)
+    path = sidecar_path(csv_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_stats(csv_path):
+    """Return the sidecar stats for ``csv_path``, or None if missing or stale."""
+    try:
+        with open(sidecar_path(csv_path), "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        st = os.stat(csv_path)
+    except (OSError, ValueError):
+        return None
+    if (
+        stats.get("version") != STATS_VERSION
+        or stats.get("source_size") != st.st_size
+        or stats.get("source_mtime") != st.st_mtime
+    ):
+        return None
+    return stats
+
+
+def get_stats(csv_path, text_column="reviewText"):
+    """Sidecar stats for ``csv_path``, regenerating the sidecar when it is missing or stale."""
+    stats = read_stats(csv_path)
+    if stats is not None:
+        return stats
+    stats = compute_stats_from_csv(csv_path, text_column=text_column)
+    try:
+        write_stats(csv_path, stats)
+    except OSError:
+        # Read-only data directory: still return the freshly computed numbers
+        pass
+    return stats
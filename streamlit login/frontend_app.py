@@ -1,8 +1,15 @@
 import streamlit as st
-import requests
 import os
+import numpy as np
 import pandas as pd
 
+from api_client import BackendClient
+from insight_helpers import quick_sentiment, extract_keywords
+from corpus_store import get_corpus_store
+from dataset_stats import get_stats
+from json_ingest import detect_text_column, read_json_preview
+from review_aggregates import AGGREGATES_DB, aggregates_version, read_product_sentiment, read_rating_distribution
+
 # Simple session storage for logged-in user
 if "auth_username" not in st.session_state:
     st.session_state["auth_username"] = None
@@ -87,34 +94,47 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Lightweight, dependency-free insight helpers
-POSITIVE_WORDS = {"good","great","awesome","excellent","love","like","satisfied","happy","amazing","fantastic","smooth","fast"}
-NEGATIVE_WORDS = {"bad","poor","terrible","hate","dislike","unsatisfied","unhappy","awful","slow","bug","issue","problem"}
-STOPWORDS = {"the","a","an","and","or","of","to","in","on","for","is","it","this","that","with","was","were","are","be","have","has","had","you","we","they","i"}
-
-def quick_sentiment(text: str) -> tuple[str, int]:
-    tokens = [t.strip('.,!?;:"\'').lower() for t in text.split()]
-    score = 0
-    for t in tokens:
-        if t in POSITIVE_WORDS:
-            score += 1
-        if t in NEGATIVE_WORDS:
-            score -= 1
-    label = "Neutral"
-    if score > 0:
-        label = "Positive"
-    elif score < 0:
-        label = "Negative"
-    return label, score
-
-def extract_keywords(text: str, top_k: int = 8) -> list[str]:
-    freq = {}
-    for raw in text.replace("\n"," ").split():
-        w = raw.strip('.,!?;:"\'').lower()
-        if not w or w in STOPWORDS or len(w) < 3:
-            continue
-        freq[w] = freq.get(w, 0) + 1
-    return [w for w, _ in sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]]
+
+UPLOADS_PAGE_SIZES = [10, 25, 50]
+
+
+def quick_insight(df: pd.DataFrame) -> tuple[str, int, list[str]] | None:
+    """Sentiment and keywords over the first review-text column of a preview frame."""
+    text_col = detect_text_column(df.columns)
+    if text_col is None:
+        return None
+    sample_text = " ".join(map(str, df[text_col].dropna().astype(str).head(200)))
+    if not sample_text:
+        return None
+    label, score = quick_sentiment(sample_text)
+    return label, score, extract_keywords(sample_text, top_k=8)
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def load_upload_preview(path: str, mtime: float, size: int) -> dict:
+    """First 50 rows and quick insight for an uploaded CSV/JSON/NDJSON.
+
+    mtime and size are part of the cache key, so a replaced file is re-read.
+    JSON is decoded incrementally, so only the previewed records are parsed.
+    """
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, nrows=50)
+    else:
+        df = read_json_preview(path, nrows=50)
+    return {"rows": df, "insight": quick_insight(df)}
+
+
+@st.cache_data(show_spinner=False)
+def load_aggregates(period: str, version: float) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Materialized review aggregates; version (DB mtime) keys the cache."""
+    return read_rating_distribution(period), read_product_sentiment(limit=20)
+
+
+@st.cache_data(show_spinner=False)
+def load_dataset_stats(path: str, text_column: str, mtime: float) -> dict:
+    """Full-dataset statistics from the precomputed sidecar; mtime keys the cache."""
+    return get_stats(path, text_column=text_column)
+
 # Helper to safely read JSON or fallback to text
 def get_error_detail(response):
     try:
@@ -135,8 +155,69 @@ choice = st.sidebar.selectbox(
     ["Login", "Register", "Forgot Password", "Profile", "Datasets"],
 )
 
-# Backend URL
-backend_url = "http://127.0.0.1:8000"
+# Backend URL used by this server; browser links (downloads) need an address
+# the analyst's machine can reach, e.g. PUBLIC_BACKEND_URL=https://reviews.example.com/api
+backend_url = os.environ.get("BACKEND_URL", "http://127.0.0.1:8000").rstrip("/")
+public_backend_url = os.environ.get("PUBLIC_BACKEND_URL", backend_url).rstrip("/")
+
+
+def public_url(path: str) -> str:
+    return f"{public_backend_url}/{path.lstrip('/')}"
+
+
+@st.cache_resource
+def get_backend_client(base_url: str) -> BackendClient:
+    """One pooled client per server process, shared by all sessions."""
+    return BackendClient(base_url)
+
+
+api = get_backend_client(backend_url)
+# Per-session cache for idempotent GETs (e.g. the profile on every rerun)
+api_cache = st.session_state.setdefault("api_cache", {})
+
+BROWSE_PAGE_SIZE = 50
+
+
+def render_dataset_browser(name: str, sentiments: list[str] | None = None, ratings: list[int] | None = None):
+    """Page through a whole preprocessed dataset served by the backend."""
+    if not st.checkbox("🔎 Browse all rows", key=f"browse_{name}"):
+        return
+    params = {"limit": BROWSE_PAGE_SIZE}
+    cols = st.columns(3)
+    with cols[0]:
+        q = st.text_input("Search text", key=f"browse_q_{name}")
+        if q:
+            params["q"] = q
+    with cols[1]:
+        if sentiments:
+            sentiment = st.selectbox("Sentiment", ["All"] + sentiments, key=f"browse_sentiment_{name}")
+            if sentiment != "All":
+                params["sentiment"] = sentiment
+        if ratings:
+            rating = st.selectbox("Rating", ["All"] + ratings, key=f"browse_rating_{name}")
+            if rating != "All":
+                params["rating"] = rating
+    with cols[2]:
+        page = st.number_input("Page", min_value=1, step=1, key=f"browse_page_{name}")
+    params["offset"] = (page - 1) * BROWSE_PAGE_SIZE
+    try:
+        # A new search can take a while on the backend; wait for it instead of re-sending it
+        resp = api.get_once(f"/datasets/{name}/rows", params=params)
+    except Exception as e:
+        st.error(f"Could not reach backend: {e}")
+        return
+    if resp.status_code != 200:
+        detail = get_error_detail(resp) or resp.text or "Failed to load rows"
+        st.error(f"{detail} (status {resp.status_code})")
+        return
+    data = resp.json()
+    num_pages = max(1, -(-data["total"] // BROWSE_PAGE_SIZE))
+    if page > num_pages:
+        st.info(f"Only {num_pages:,} page(s) match these filters.")
+        return
+    st.caption(f"Page {page} of {num_pages:,} ({data['total']:,} matching rows)")
+    st.dataframe(pd.DataFrame(data["rows"], columns=data["columns"]), use_container_width=True, height=400)
+
 
 if choice == "Register":
     st.subheader("Create a New Account")
@@ -145,8 +226,8 @@ if choice == "Register":
     full_name = st.text_input("Full Name (optional)")
     email = st.text_input("Email (optional)")
     if st.button("Register"):
-        response = requests.post(
-            f"{backend_url}/register",
+        response = api.post(
+            "/register",
             json={
                 "username": username,
                 "password": password,
@@ -165,11 +246,12 @@ elif choice == "Login":
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
     if st.button("Login"):
-        response = requests.post(
-            f"{backend_url}/login", json={"username": username, "password": password}
+        response = api.post(
+            "/login", json={"username": username, "password": password}
         )
         if response.status_code == 200:
             st.session_state["auth_username"] = username
+            api.invalidate(api_cache)
             st.success(get_message(response) or "Login successful")
         else:
             detail = get_error_detail(response) or response.text or "Invalid credentials"
@@ -183,7 +265,7 @@ elif choice == "Forgot Password":
         st.caption("Enter your registered email to receive a reset token (valid 10 minutes)")
         fp_email = st.text_input("Registered Email")
         if st.button("Request reset token"):
-            resp = requests.post(f"{backend_url}/forgot_password/request_token", json={"email": fp_email})
+            resp = api.post("/forgot_password/request_token", json={"email": fp_email})
             if resp.status_code == 200:
                 data = resp.json()
                 st.session_state["fp_token"] = data.get("reset_token")
@@ -200,8 +282,8 @@ elif choice == "Forgot Password":
         else:
             new_pwd = st.text_input("New Password", type="password")
             if st.button("Reset Password"):
-                resp = requests.post(
-                    f"{backend_url}/forgot_password/reset",
+                resp = api.post(
+                    "/forgot_password/reset",
                     json={"token": token, "new_password": new_pwd},
                 )
                 if resp.status_code == 200:
@@ -217,7 +299,7 @@ elif choice == "Profile":
     else:
         st.subheader("Profile Management")
         username = st.session_state["auth_username"]
-        prof = requests.get(f"{backend_url}/profile/{username}")
+        prof = api.cached_get(f"/profile/{username}", api_cache)
         if prof.status_code != 200:
             detail = get_error_detail(prof) or prof.text or "Failed to load profile"
             st.error(f"{detail} (status {prof.status_code})")
@@ -227,11 +309,12 @@ elif choice == "Profile":
             full_name = st.text_input("Full Name", value=data.get("full_name", ""))
             email = st.text_input("Email", value=data.get("email", ""))
             if st.button("Save Profile"):
-                resp = requests.put(
-                    f"{backend_url}/profile/{username}",
+                resp = api.put(
+                    f"/profile/{username}",
                     json={"full_name": full_name, "email": email},
                 )
                 if resp.status_code == 200:
+                    api.invalidate(api_cache, f"/profile/{username}")
                     st.success("Profile updated")
                 else:
                     detail = get_error_detail(resp) or resp.text or "Update failed"
@@ -242,8 +325,8 @@ elif choice == "Profile":
             old_pw = st.text_input("Old Password", type="password")
             new_pw = st.text_input("New Password", type="password")
             if st.button("Change Password"):
-                resp = requests.post(
-                    f"{backend_url}/change_password",
+                resp = api.post(
+                    "/change_password",
                     json={
                         "username": username,
                         "old_password": old_pw,
@@ -259,6 +342,7 @@ elif choice == "Profile":
             st.markdown("---")
             if st.button("Sign out"):
                 st.session_state["auth_username"] = None
+                api.invalidate(api_cache)
                 st.success("Signed out")
 
 elif choice == "Datasets":
@@ -271,18 +355,24 @@ elif choice == "Datasets":
     preprocessed_file = os.path.join(os.path.dirname(__file__), "data", "preprocessed_reviews.csv")
     sentiment_file = os.path.join(os.path.dirname(__file__), "data", "preprocessed_sentiment_analysis.csv")
     
-    tab1, tab2 = st.tabs(["📦 Amazon Reviews", "💬 Sentiment Analysis"])
+    tab1, tab2, tab3 = st.tabs(["📦 Amazon Reviews", "💬 Sentiment Analysis", "📈 Review Aggregates"])
     
     with tab1:
         st.markdown("#### Amazon Customer Reviews Dataset")
         if os.path.exists(preprocessed_file):
             st.success("✅ Amazon Reviews preprocessing completed!")
-            st.info("📊 4,915 reviews processed and ready for sentiment analysis")
+            amazon_stats = load_dataset_stats(preprocessed_file, "reviewText", os.path.getmtime(preprocessed_file))
+            st.info(f"📊 {amazon_stats['rows']:,} reviews processed and ready for sentiment analysis")
             
             # Load and display preprocessed data
             if st.button("View Amazon Reviews Data", key="view_amazon"):
                 try:
-                    df_preprocessed = pd.read_csv(preprocessed_file, nrows=100)
+                    # The memory-mapped store is shared by all sessions; fall back to the CSV
+                    corpus = get_corpus_store(preprocessed_file)
+                    if corpus is not None:
+                        df_preprocessed = corpus.frame(range(min(10, corpus.rows)))
+                    else:
+                        df_preprocessed = pd.read_csv(preprocessed_file, nrows=10)
                     
                     st.markdown("##### Sample: Original vs Processed Text")
                     if 'reviewText' in df_preprocessed.columns and 'processed_text' in df_preprocessed.columns:
@@ -292,23 +382,28 @@ elif choice == "Datasets":
                         # Show statistics
                         col1, col2, col3 = st.columns(3)
                         with col1:
-                            st.metric("Total Reviews", len(df_preprocessed))
+                            st.metric("Total Reviews", f"{amazon_stats['rows']:,}")
                         with col2:
-                            avg_original = df_preprocessed['reviewText'].str.len().mean()
-                            st.metric("Avg Original Length", f"{avg_original:.0f} chars")
+                            st.metric("Avg Original Length", f"{amazon_stats['avg_original_length']:.0f} chars")
                         with col3:
-                            avg_processed = df_preprocessed['processed_text'].str.len().mean()
-                            st.metric("Avg Processed Length", f"{avg_processed:.0f} chars")
+                            st.metric("Avg Processed Length", f"{amazon_stats['avg_processed_length']:.0f} chars")
+                        
+                        if corpus is not None and "overall" in corpus.numeric_columns:
+                            ratings = corpus.numeric("overall")
+                            ratings = ratings[~np.isnan(ratings)].round().astype(int)
+                            counts = np.bincount(ratings, minlength=6)[1:6]
+                            st.markdown("##### Rating distribution (all reviews)")
+                            st.bar_chart(pd.DataFrame({"reviews": counts}, index=[1, 2, 3, 4, 5]))
                         
-                        # Download button
-                        st.download_button(
-                            label="📥 Download Amazon Reviews (CSV)",
-                            data=open(preprocessed_file, 'rb').read(),
-                            file_name="preprocessed_amazon_reviews.csv",
-                            mime="text/csv"
+                        # Download link, streamed by the backend
+                        st.link_button(
+                            "📥 Download Amazon Reviews (CSV)",
+                            public_url("/datasets/amazon_reviews/download"),
                         )
                 except Exception as e:
                     st.error(f"Error loading data: {e}")
+            
+            render_dataset_browser("amazon_reviews", ratings=[1, 2, 3, 4, 5])
         else:
             st.warning("⚠️ Amazon reviews preprocessing not found.")
             if st.button("Run Amazon Reviews Preprocessing", key="run_amazon"):
@@ -318,12 +413,14 @@ elif choice == "Datasets":
         st.markdown("#### Sentiment Analysis Dataset")
         if os.path.exists(sentiment_file):
             st.success("✅ Sentiment Analysis preprocessing completed!")
-            st.info("📊 96 sentiment-labeled texts processed")
+            sentiment_stats = load_dataset_stats(sentiment_file, "Text", os.path.getmtime(sentiment_file))
+            label_counts = sentiment_stats.get("label_counts") or {}
+            st.info(f"📊 {sentiment_stats['rows']:,} sentiment-labeled texts processed")
             
             # Load and display preprocessed data
             if st.button("View Sentiment Analysis Data", key="view_sentiment"):
                 try:
-                    df_sentiment = pd.read_csv(sentiment_file, nrows=100)
+                    df_sentiment = pd.read_csv(sentiment_file, nrows=10)
                     
                     st.markdown("##### Sample: Original vs Processed Text")
                     if 'Text' in df_sentiment.columns and 'processed_text' in df_sentiment.columns:
@@ -333,31 +430,47 @@ elif choice == "Datasets":
                         # Show statistics
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
-                            st.metric("Total Texts", len(df_sentiment))
+                            st.metric("Total Texts", f"{sentiment_stats['rows']:,}")
                         with col2:
-                            positive_count = (df_sentiment['Sentiment'] == 'Positive').sum() if 'Sentiment' in df_sentiment.columns else 0
-                            st.metric("Positive", positive_count)
+                            st.metric("Positive", label_counts.get("Positive", 0))
                         with col3:
-                            negative_count = (df_sentiment['Sentiment'] == 'Negative').sum() if 'Sentiment' in df_sentiment.columns else 0
-                            st.metric("Negative", negative_count)
+                            st.metric("Negative", label_counts.get("Negative", 0))
                         with col4:
-                            avg_processed = df_sentiment['processed_text'].str.len().mean()
-                            st.metric("Avg Length", f"{avg_processed:.0f} chars")
+                            st.metric("Avg Length", f"{sentiment_stats['avg_processed_length']:.0f} chars")
                         
-                        # Download button
-                        st.download_button(
-                            label="📥 Download Sentiment Analysis (CSV)",
-                            data=open(sentiment_file, 'rb').read(),
-                            file_name="preprocessed_sentiment_analysis.csv",
-                            mime="text/csv"
+                        # Download link, streamed by the backend
+                        st.link_button(
+                            "📥 Download Sentiment Analysis (CSV)",
+                            public_url("/datasets/sentiment_analysis/download"),
                         )
                 except Exception as e:
                     st.error(f"Error loading data: {e}")
+            
+            render_dataset_browser("sentiment_analysis", sentiments=sorted(label_counts))
         else:
             st.warning("⚠️ Sentiment analysis preprocessing not found.")
             if st.button("Run Sentiment Preprocessing", key="run_sentiment"):
                 st.info("Execute: `python preprocess_sentiment_data.py`")
     
+    with tab3:
+        st.markdown("#### Ratings and Sentiment Over Time")
+        if not os.path.exists(AGGREGATES_DB):
+            st.info("No aggregates yet. Execute: `python review_aggregates.py`")
+        else:
+            period = st.radio("Period", ["month", "day"], horizontal=True, key="agg_period")
+            try:
+                rating_dist, product_sentiment = load_aggregates(period, aggregates_version())
+                if rating_dist.empty:
+                    st.info("No reviews aggregated yet.")
+                else:
+                    st.markdown("##### Rating distribution")
+                    st.bar_chart(rating_dist)
+                    st.markdown("##### Sentiment by product (most reviewed)")
+                    st.caption("Weighted sentiment counts each review 1 + helpful votes times.")
+                    st.dataframe(product_sentiment, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error loading aggregates: {e}")
+    
     st.markdown("---")
     
     # Existing file upload section
@@ -365,19 +478,36 @@ elif choice == "Datasets":
     uploads_dir = os.path.join(os.path.dirname(__file__), "data", "uploads")
     os.makedirs(uploads_dir, exist_ok=True)
 
-    st.caption("Drag and drop or browse to upload one or more files. They will be saved to data/uploads.")
+    st.caption("Drag and drop or browse to upload one or more files. They are sent to the backend in chunks and saved to data/uploads. For multi-GB files use `python api_client.py <file>`.")
     files = st.file_uploader(
         "Upload files",
-        type=["csv", "json", "txt", "png", "jpg", "jpeg"],
+        type=["csv", "json", "ndjson", "jsonl", "txt", "png", "jpg", "jpeg"],
         accept_multiple_files=True,
     )
 
+    preprocess_uploads = st.checkbox("Preprocess CSV/JSON text after upload", key="preprocess_uploads")
+
     if files:
+        # The uploader keeps returning the same files on every rerun; send each once
+        sent = st.session_state.setdefault("uploaded_file_ids", set())
+        stored = []
         for f in files:
-            save_path = os.path.join(uploads_dir, f.name)
-            with open(save_path, "wb") as out:
-                out.write(f.getbuffer())
-        st.success(f"Uploaded {len(files)} file(s) to data/uploads")
+            file_key = getattr(f, "file_id", None) or (f.name, f.size)
+            if file_key in sent:
+                continue
+            try:
+                resp = api.upload_file(f, f.name, size=f.size, preprocess=preprocess_uploads)
+            except Exception as e:
+                st.error(f"Upload of {f.name} failed: {e}")
+                continue
+            if resp.status_code == 200:
+                sent.add(file_key)
+                stored.append(resp.json().get("stored_as", f.name))
+            else:
+                detail = get_error_detail(resp) or resp.text or "Upload failed"
+                st.error(f"Upload of {f.name} failed: {detail} (status {resp.status_code})")
+        if stored:
+            st.success(f"Uploaded {len(stored)} file(s) to data/uploads: {', '.join(stored)}")
 
     st.markdown("### Uploaded files")
     existing = sorted([fn for fn in os.listdir(uploads_dir)])
@@ -401,12 +531,27 @@ elif choice == "Datasets":
                 except Exception:
                     pass
 
-        for name in existing:
+        # Paginate so each rerun only touches one page of files
+        page_size = st.selectbox("Files per page", UPLOADS_PAGE_SIZES, key="uploads_page_size")
+        num_pages = max(1, -(-len(existing) // page_size))
+        if st.session_state.get("uploads_page", 1) > num_pages:
+            st.session_state["uploads_page"] = num_pages
+        page = st.number_input("Page", min_value=1, max_value=num_pages, step=1, key="uploads_page")
+        st.caption(f"Page {page} of {num_pages} ({len(existing)} files)")
+        page_start = (page - 1) * page_size
+
+        for name in existing[page_start:page_start + page_size]:
             path = os.path.join(uploads_dir, name)
-            cols = st.columns([6, 2])
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            cols = st.columns([6, 2, 2])
             with cols[0]:
-                st.write(f"- {name} ({os.path.getsize(path)} bytes)")
+                st.write(f"- {name} ({stat.st_size} bytes)")
             with cols[1]:
+                show_preview = st.checkbox("Preview", key=f"pv_{name}")
+            with cols[2]:
                 if st.button("Remove", key=f"rm_{name}"):
                     try:
                         os.remove(path)
@@ -417,37 +562,19 @@ elif choice == "Datasets":
                             pass
                     except Exception as e:
                         st.error(f"Could not remove {name}: {e}")
+            if not show_preview:
+                continue
             lower = name.lower()
             try:
-                if lower.endswith(".csv"):
-                    df = pd.read_csv(path, nrows=50)
-                    # Quick insights for CSV with review text
-                    st.dataframe(df)
-                    text_cols = [c for c in df.columns if c.lower() in ("review", "reviewtext", "text", "comments")]
-                    if text_cols:
-                        col = text_cols[0]
-                        sample_text = " ".join(map(str, df[col].dropna().astype(str).head(200)))
-                        if sample_text:
-                            label, score = quick_sentiment(sample_text)
-                            keys = extract_keywords(sample_text, top_k=8)
-                            st.markdown(
-                                f"<div class='card'><b>Quick Insight</b><br/>Sentiment: <b>{label}</b> (score {score})<br/>Top Keywords: <code>{', '.join(keys)}</code></div>",
-                                unsafe_allow_html=True,
-                            )
-                elif lower.endswith(".json"):
-                    df = pd.read_json(path, lines=False)
-                    st.dataframe(df.head(50))
-                    text_cols = [c for c in df.columns if c.lower() in ("review", "reviewtext", "text", "comments")]
-                    if text_cols:
-                        col = text_cols[0]
-                        sample_text = " ".join(map(str, df[col].dropna().astype(str).head(200)))
-                        if sample_text:
-                            label, score = quick_sentiment(sample_text)
-                            keys = extract_keywords(sample_text, top_k=8)
-                            st.markdown(
-                                f"<div class='card'><b>Quick Insight</b><br/>Sentiment: <b>{label}</b> (score {score})<br/>Top Keywords: <code>{', '.join(keys)}</code></div>",
-                                unsafe_allow_html=True,
-                            )
+                if lower.endswith((".csv", ".json", ".ndjson", ".jsonl")):
+                    preview = load_upload_preview(path, stat.st_mtime, stat.st_size)
+                    st.dataframe(preview["rows"])
+                    if preview["insight"]:
+                        label, score, keys = preview["insight"]
+                        st.markdown(
+                            f"<div class='card'><b>Quick Insight</b><br/>Sentiment: <b>{label}</b> (score {score})<br/>Top Keywords: <code>{', '.join(keys)}</code></div>",
+                            unsafe_allow_html=True,
+                        )
                 elif lower.endswith((".png", ".jpg", ".jpeg")):
                     st.image(path, caption=name, use_column_width=True)
             except Exception as e:
@@ -0,0 +1,228 @@
+"""Bounded-memory top-k terms and phrases over a stream of token lists.
+
+Each n-gram order (unigrams, bigrams, trigrams by default) has a Count-Min
+Sketch (``depth`` x ``width`` counters) and a candidate set of at most ``k``
+n-grams with their estimated counts. Memory is fixed by those sizes no
+matter how long the stream runs, unlike an exact dictionary of every phrase.
+Counts are over-estimates by at most ``e / width`` of the stream total with
+probability ``1 - exp(-depth)``.
+
+- Sketches with the same shape can be merged: a worker process
+  can count its share of the stream and the parent adds the results.
+- With ``half_life`` (seconds), counts decay exponentially, so the top list
+  reflects recent activity ("top complaining phrases this hour").
+
+Live text can be fed straight from the preprocessing stream:
+``tracker.consume(pipeline.iter_preprocess(texts, return_as_list=True))``.
+
+Hashing uses pandas' fixed-key hash, so bucket positions are the same in
+every process and merged sketches line up.
+
+Usage: python heavy_hitters.py [preprocessed_csv] [max_rating] [half_life_hours]
+"""
+import heapq
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class CountMinSketch:
+    def __init__(self, width=2 ** 14, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self.total = 0.0
+
+    def _indexes(self, keys):
+        # Double hashing: row i uses h1 + i * h2, from one 64-bit hash per key
+        hashes = pd.util.hash_array(np.asarray(keys, dtype=object))
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        return [((h1 + np.uint64(i) * h2) % np.uint64(self.width)).astype(np.int64) for i in range(self.depth)]
+
+    def add(self, keys, weights):
+        if not len(keys):
+            return
+        weights = np.asarray(weights, dtype=np.float64)
+        for row, index in enumerate(self._indexes(keys)):
+            self.table[row] += np.bincount(index, weights=weights, minlength=self.width)
+        self.total += float(weights.sum())
+
+    def estimate(self, keys):
+        if not len(keys):
+            return np.zeros(0)
+        return np.min([self.table[row, index] for row, index in enumerate(self._indexes(keys))], axis=0)
+
+    def scale(self, factor):
+        self.table *= factor
+        self.total *= factor
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Only sketches with the same width and depth can be merged")
+        self.table += other.table
+        self.total += other.total
+
+
+def iter_ngrams(tokens, n):
+    return (" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+class HeavyHitters:
+    """Approximate top-k n-grams per order over a stream of token lists."""
+
+    def __init__(self, k=50, ngram_range=(1, 3), width=2 ** 14, depth=4, half_life=None):
+        self.k = k
+        self.orders = tuple(range(ngram_range[0], ngram_range[1] + 1))
+        self.half_life = half_life
+        self.sketches = {n: CountMinSketch(width, depth) for n in self.orders}
+        self.candidates = {n: {} for n in self.orders}
+        self.last_time = None
+
+    def _decay_to(self, now):
+        if self.half_life is None or now is None:
+            return
+        if self.last_time is not None and now > self.last_time:
+            factor = 0.5 ** ((now - self.last_time) / self.half_life)
+            for n in self.orders:
+                self.sketches[n].scale(factor)
+                candidates = self.candidates[n]
+                for key in candidates:
+                    candidates[key] *= factor
+        if self.last_time is None or now > self.last_time:
+            self.last_time = now
+
+    def _weight(self, timestamp):
+        # Items older than the newest one seen count for less, not more
+        if self.half_life is None or timestamp is None or self.last_time is None:
+            return 1.0
+        return 0.5 ** (max(0.0, self.last_time - timestamp) / self.half_life)
+
+    def update(self, documents, timestamps=None):
+        """Count the n-grams of a batch of token lists (one list per review).
+
+        ``timestamps`` (seconds, one per document) drive the decay; without
+        them the batch is stamped with the current time when decay is on.
+        """
+        documents = [list(tokens) for tokens in documents]
+        if timestamps is None:
+            timestamps = [time.time() if self.half_life is not None else None] * len(documents)
+        timestamps = list(timestamps)
+        stamped = [t for t in timestamps if t is not None]
+        self._decay_to(max(stamped) if stamped else None)
+        weights = [self._weight(t) for t in timestamps]
+
+        for n in self.orders:
+            counts = {}
+            for tokens, weight in zip(documents, weights):
+                for gram in iter_ngrams(tokens, n):
+                    counts[gram] = counts.get(gram, 0.0) + weight
+            if not counts:
+                continue
+            keys = list(counts)
+            sketch = self.sketches[n]
+            sketch.add(keys, list(counts.values()))
+            self._offer(n, keys, sketch.estimate(keys))
+        return self
+
+    def _offer(self, n, keys, estimates):
+        candidates = self.candidates[n]
+        threshold = min(candidates.values()) if len(candidates) >= self.k else 0.0
+        for key, estimate in zip(keys, estimates):
+            if key in candidates or estimate > threshold:
+                candidates[key] = float(estimate)
+        if len(candidates) > self.k:
+            self.candidates[n] = dict(heapq.nlargest(self.k, candidates.items(), key=lambda item: item[1]))
+
+    def consume(self, token_lists, batch_size=1000):
+        """Feed a (possibly endless) iterable of token lists, one batch at a time."""
+        batch = []
+        for tokens in token_lists:
+            batch.append(tokens)
+            if len(batch) >= batch_size:
+                self.update(batch)
+                batch = []
+        if batch:
+            self.update(batch)
+        return self
+
+    def top(self, n=1, limit=None):
+        """[(ngram, estimated_count)] for one n-gram order, highest first."""
+        items = sorted(self.candidates[n].items(), key=lambda item: item[1], reverse=True)
+        return items[:limit] if limit else items
+
+    def merge(self, other):
+        """Add another worker's counts into this one (same k, orders, shape and half-life)."""
+        if other.orders != self.orders or other.half_life != self.half_life:
+            raise ValueError("Only trackers with the same n-gram range and half-life can be merged")
+        if self.half_life is not None and other.last_time is not None:
+            # Bring both to the later clock before adding
+            self._decay_to(other.last_time)
+            lag = self.last_time - other.last_time
+            factor = 0.5 ** (lag / self.half_life)
+        else:
+            factor = 1.0
+        for n in self.orders:
+            self.sketches[n].merge(_scaled(other.sketches[n], factor))
+            keys = list(set(self.candidates[n]) | set(other.candidates[n]))
+            self.candidates[n] = {}
+            if keys:
+                self._offer(n, keys, self.sketches[n].estimate(keys))
+        if self.last_time is None:
+            self.last_time = other.last_time
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+def _scaled(sketch, factor):
+    if factor == 1.0:
+        return sketch
+    copy = CountMinSketch(sketch.width, sketch.depth)
+    copy.table = sketch.table * factor
+    copy.total = sketch.total * factor
+    return copy
+
+
+def main():
+    """Top phrases in low-rated reviews of a preprocessed CSV, streamed in chunks."""
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "preprocessed_reviews.csv")
+    max_rating = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    half_life = float(sys.argv[3]) * 3600 if len(sys.argv) > 3 else None
+
+    print("=" * 60)
+    print(f"TOP PHRASES IN REVIEWS RATED <= {max_rating:g}")
+    print("=" * 60)
+    tracker = HeavyHitters(k=50, half_life=half_life)
+    reviews = 0
+    for chunk in pd.read_csv(csv_path, chunksize=10_000):
+        if "overall" in chunk.columns:
+            chunk = chunk[pd.to_numeric(chunk["overall"], errors="coerce") <= max_rating]
+        documents = [str(text).split() for text in chunk["processed_text"].fillna("")]
+        timestamps = chunk["unixReviewTime"].astype(float).tolist() if "unixReviewTime" in chunk.columns else None
+        tracker.update(documents, timestamps if half_life else None)
+        reviews += len(documents)
+    print(f"Counted {reviews} reviews")
+    for n in tracker.orders:
+        print(f"\nTop {n}-grams:")
+        for gram, count in tracker.top(n, limit=10):
+            print(f"  {gram:<40} {count:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Lightweight, dependency-free insight helpers shared by the frontend and batch jobs."""
+
+POSITIVE_WORDS = {"good","great","awesome","excellent","love","like","satisfied","happy","amazing","fantastic","smooth","fast"}
+NEGATIVE_WORDS = {"bad","poor","terrible","hate","dislike","unsatisfied","unhappy","awful","slow","bug","issue","problem"}
+STOPWORDS = {"the","a","an","and","or","of","to","in","on","for","is","it","this","that","with","was","were","are","be","have","has","had","you","we","they","i"}
+
+def quick_sentiment(text: str) -> tuple[str, int]:
+    tokens = [t.strip('.,!?;:"\'').lower() for t in text.split()]
+    score = 0
+    for t in tokens:
+        if t in POSITIVE_WORDS:
+            score += 1
+        if t in NEGATIVE_WORDS:
+            score -= 1
+    label = "Neutral"
+    if score > 0:
+        label = "Positive"
+    elif score < 0:
+        label = "Negative"
+    return label, score
+
+def extract_keywords(text: str, top_k: int = 8) -> list[str]:
+    freq = {}
+    for raw in text.replace("\n"," ").split():
+        w = raw.strip('.,!?;:"\'').lower()
+        if not w or w in STOPWORDS or len(w) < 3:
+            continue
+        freq[w] = freq.get(w, 0) + 1
+    return [w for w, _ in sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]]
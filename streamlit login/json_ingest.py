@@ -0,0 +1,127 @@
+"""Incremental reading of JSON-array and NDJSON review exports.
+
+Records are decoded one at a time from a small rolling buffer, so a preview
+or a chunked preprocessing run never holds more than the records it is
+working on, whatever the size of the file. Supported layouts:
+
+- a top-level JSON array of records: ``[{...}, {...}]``
+- NDJSON / JSON Lines, or any stream of concatenated JSON values
+
+A record larger than ``MAX_RECORD_SIZE`` (usually a malformed or truncated
+one, which would otherwise pull the rest of the file into the buffer) raises
+a ValueError with the byte offset where it starts.
+"""
+import json
+from itertools import islice
+
+import pandas as pd
+
+READ_SIZE = 1 << 16
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+WHITESPACE = " \t\r\n"
+REVIEW_TEXT_COLUMNS = ("review", "reviewtext", "text", "comments")
+
+
+class _BufferedDecoder:
+    """Decode consecutive JSON values from a text file using a rolling buffer."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.consumed_bytes = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(READ_SIZE)
+        if not data:
+            self.eof = True
+        # Drop consumed text so the buffer stays around one read plus one record
+        self.consumed_bytes += len(self.buf[:self.pos].encode("utf-8"))
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def advance(self):
+        self.pos += 1
+
+    def offset(self):
+        """Byte offset in the file of the current position."""
+        return self.consumed_bytes + len(self.buf[:self.pos].encode("utf-8"))
+
+    def decode(self):
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Malformed or truncated JSON record at byte {self.offset()}: {e.msg}") from e
+                if len(self.buf) - self.pos > MAX_RECORD_SIZE:
+                    raise ValueError(
+                        f"JSON record at byte {self.offset()} is not complete after "
+                        f"{MAX_RECORD_SIZE} bytes; the file is malformed or the record is too large"
+                    ) from e
+                self._fill()
+                continue
+            # A number at the very end of the buffer may continue in the next read
+            if end == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_records(path):
+    """Yield records from a JSON array or NDJSON file one at a time.
+
+    Non-object values are wrapped as ``{"value": ...}`` so every record maps
+    to a DataFrame row.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        reader = _BufferedDecoder(f)
+        in_array = reader.peek() == "["
+        if in_array:
+            reader.advance()
+        while True:
+            c = reader.peek()
+            if not c or (in_array and c == "]"):
+                return
+            if in_array and c == ",":
+                reader.advance()
+                continue
+            record = reader.decode()
+            yield record if isinstance(record, dict) else {"value": record}
+
+
+def iter_json_chunks(path, chunksize=1000):
+    """Yield DataFrames of up to ``chunksize`` records."""
+    records = iter_json_records(path)
+    while True:
+        batch = list(islice(records, chunksize))
+        if not batch:
+            return
+        yield pd.DataFrame(batch)
+
+
+def read_json_preview(path, nrows=50):
+    """First ``nrows`` records as a DataFrame, without parsing the rest of the file."""
+    return pd.DataFrame(list(islice(iter_json_records(path), nrows)))
+
+
+def detect_text_column(columns):
+    """Return the first column that looks like review text, or None."""
+    for column in columns:
+        if str(column).lower() in REVIEW_TEXT_COLUMNS:
+            return column
+    return None
@@ -0,0 +1,98 @@
+"""Versioned schema migrations for the SQLite user database.
+
+The applied schema version is stored in SQLite's ``PRAGMA user_version``, so a
+database that is already up to date costs a single pragma read at startup.
+Each migration runs in its own transaction and bumps the version on success;
+errors are raised instead of being swallowed so a broken schema is noticed
+at boot rather than on the first failing insert.
+"""
+
+# -----------------------------
+# Migration steps
+# -----------------------------
+def _add_profile_columns(cur):
+    """Add profile/security columns missing from legacy users tables."""
+    cur.execute("PRAGMA table_info(users)")
+    existing = {row[1] for row in cur.fetchall()}  # column name at index 1
+    add_specs = [
+        ("full_name", "TEXT"),
+        ("email", "TEXT"),
+        ("security_question", "TEXT"),
+        ("security_answer_hash", "TEXT"),
+        ("age_group", "TEXT"),
+        ("language_preference", "TEXT"),
+        ("wellness_goals", "TEXT"),
+    ]
+    for name, coltype in add_specs:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE users ADD COLUMN {name} {coltype}")
+
+
+def _add_lookup_indexes(cur):
+    """Index the columns used by the forgot-password and reset lookups."""
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_users_email ON users (email)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_password_resets_username ON password_resets (username)")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_password_resets_token ON password_resets (token)")
+
+
+# Ordered list of (version, description, step). Never edit or reorder an
+# entry once released; append a new version instead.
+MIGRATIONS = [
+    (1, "add profile and security columns to users", _add_profile_columns),
+    (2, "add indexes for email and reset token lookups", _add_lookup_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def get_schema_version(conn):
+    """Return the schema version recorded in the database."""
+    cur = conn.cursor()
+    try:
+        cur.execute("PRAGMA user_version")
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def apply_migrations(conn):
+    """Apply all pending migrations on a DB-API SQLite connection.
+
+    Returns the list of versions that were applied (empty when the schema is
+    already current).
+    """
+    current = get_schema_version(conn)
+    if current >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for version, _description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        cur = conn.cursor()
+        try:
+            # sqlite3 does not open a transaction for DDL on its own
+            cur.execute("BEGIN")
+            step(cur)
+            # PRAGMA does not accept bound parameters; version is an int literal
+            cur.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+        applied.append(version)
+    return applied
+
+
+def migrate_engine(engine):
+    """Apply pending migrations using a raw connection from a SQLAlchemy engine."""
+    raw = engine.raw_connection()
+    try:
+        return apply_migrations(raw)
+    finally:
+        raw.close()
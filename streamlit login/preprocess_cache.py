@@ -0,0 +1,215 @@
+"""Persistent, content-addressed cache of text preprocessing results.
+
+The same review texts show up in amazon_reviews.csv, in re-uploads and in the
+sentiment dataset. Results are stored in SQLite (``data/preprocess_cache.db``)
+under a 16-byte key: the SHA-256 of the raw text plus a namespace built from
+the pipeline configuration (stages, lemmatize mode, spaCy/NLTK versions,
+stopword list and PREPROCESS_VERSION). A change to any of those starts a new
+namespace instead of returning stale output.
+
+- Lookups are bulk ``IN (...)`` queries; misses are written back in batches
+  (pending writes are flushed every ``write_batch_size`` results, on
+  ``flush``/``close`` and at interpreter exit).
+- WAL mode, a busy timeout and short ``BEGIN IMMEDIATE`` write transactions
+  make it safe for concurrent readers and writers across processes. Entries
+  are content-addressed, so two processes writing the same key agree.
+- When the live pages exceed ``max_bytes`` the least recently used entries
+  are evicted. ``last_used`` is refreshed at most once an hour per entry, so
+  cache hits do not turn reads into writes.
+
+Usage: python preprocess_cache.py [stats|clear]
+"""
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CACHE_DB = os.path.join(DATA_DIR, "preprocess_cache.db")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+LOOKUP_BATCH_SIZE = 500
+WRITE_BATCH_SIZE = 1000
+TOUCH_INTERVAL = 3600
+EVICT_FRACTION = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_results_last_used ON results (last_used);
+"""
+
+
+def make_namespace(config):
+    """Namespace bytes for a JSON-serializable pipeline configuration."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).digest()
+
+
+def cache_key(namespace, text):
+    return hashlib.sha256(namespace + text.encode("utf-8", "surrogatepass")).digest()[:16]
+
+
+class PreprocessCache:
+    def __init__(self, path=CACHE_DB, max_bytes=DEFAULT_MAX_BYTES, write_batch_size=WRITE_BATCH_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.write_batch_size = write_batch_size
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touch = set()
+        self._lock = threading.Lock()
+        self._conn = None
+        atexit.register(self.flush)
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Autocommit mode; writes use explicit BEGIN IMMEDIATE transactions
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys):
+        """Cached values for whichever ``keys`` are present, as {key: value}."""
+        found = {}
+        now = int(time.time())
+        with self._lock:
+            unique = []
+            for key in dict.fromkeys(keys):
+                if key in self._pending:
+                    found[key] = self._pending[key]
+                else:
+                    unique.append(key)
+            conn = self._connection()
+            for start in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value, last_used FROM results WHERE key IN ({placeholders})", batch
+                )
+                for key, value, last_used in rows:
+                    found[key] = json.loads(value)
+                    if now - last_used > TOUCH_INTERVAL:
+                        self._touch.add(key)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Queue (key, value) results; they are written once a batch has built up."""
+        with self._lock:
+            self._pending.update(items)
+            full = len(self._pending) >= self.write_batch_size
+        if full:
+            self.flush()
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def flush(self):
+        """Write pending results and refresh last_used of recent hits in one transaction."""
+        with self._lock:
+            if not self._pending and not self._touch:
+                return
+            now = int(time.time())
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), now) for key, value in self._pending.items()],
+                )
+                conn.executemany(
+                    "UPDATE results SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in self._touch if key not in self._pending],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._pending.clear()
+            self._touch.clear()
+            self._evict(conn)
+
+    def used_bytes(self):
+        with self._lock:
+            return self._used_bytes(self._connection())
+
+    @staticmethod
+    def _used_bytes(conn):
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict(self, conn):
+        # Freed pages are reused by later inserts, so the file stops growing
+        while self._used_bytes(conn) > self.max_bytes:
+            rows = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if not rows:
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)",
+                    (max(1, int(rows * EVICT_FRACTION)),),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            used = self._used_bytes(conn)
+        return {"entries": rows, "bytes": used, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._touch.clear()
+            conn = self._connection()
+            conn.execute("DELETE FROM results")
+            conn.execute("VACUUM")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        atexit.unregister(self.flush)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = PreprocessCache()
+    if command == "clear":
+        cache.clear()
+        print(f"Cleared {CACHE_DB}")
+    elif command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} cached results, {stats['bytes'] / 1e6:.1f} MB of {stats['max_bytes'] / 1e6:.0f} MB")
+    else:
+        print(__doc__)
+        sys.exit(2)
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import pandas as pd
 import re
 from text_preprocessing import TextPreprocessingPipeline
+from preprocess_cache import PreprocessCache
+from dataset_stats import compute_stats, write_stats
 
 def parse_sentiment_data():
     """Parse the sentiment_analysis.csv with proper formatting issues"""
@@ -77,8 +79,8 @@ def main():
         print("Failed to parse sentiment data. Exiting.")
         return
     
-    # Initialize preprocessing pipeline
-    pipeline = TextPreprocessingPipeline()
+    # Initialize preprocessing pipeline, sharing cached results with the other scripts
+    pipeline = TextPreprocessingPipeline(cache=PreprocessCache())
     
     # Process the dataset
     df_processed = pipeline.process_dataset(df, text_column='Text')
@@ -95,6 +97,10 @@ def main():
         print(f"Results saved to: {output_file}")
         print(f"Total rows saved: {len(df_processed)}")
         
+        # Precompute full-dataset statistics for the frontend
+        stats_file = write_stats(output_file, compute_stats(df_processed, text_column='Text'))
+        print(f"Statistics saved to: {stats_file}")
+        
         # Show sample results
         print("\nSample preprocessed texts:")
         sample_df = df_processed[['Text', 'processed_text']].head(10)
@@ -0,0 +1,223 @@
+"""Incrementally maintained aggregate views over preprocessed reviews.
+
+Aggregates live in a small SQLite database (``data/aggregates.db``):
+
+- rating distribution per day and per month (``overall`` x ``unixReviewTime``)
+- per-product (``asin``) review count, average rating and lexicon sentiment
+- helpfulness-weighted sentiment per product, weighting each review by
+  ``1 + helpful_yes``
+
+Each preprocessed chunk is folded in with additive UPSERTs, so new data never
+triggers a recomputation from scratch. Reviews are keyed by
+(reviewerID, asin, unixReviewTime), or by product, day, rating and text when
+there is no reviewerID, and remembered, so re-running a
+preprocessing job over the same reviews does not double count them.
+
+Backfill from the existing dataset: python review_aggregates.py
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+from insight_helpers import quick_sentiment
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+AGGREGATES_DB = os.path.join(DATA_DIR, "aggregates.db")
+REQUIRED_COLUMNS = ("asin", "overall", "unixReviewTime")
+KEY_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_reviews (review_key TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rating_by_day (
+    day TEXT NOT NULL, rating INTEGER NOT NULL, reviews INTEGER NOT NULL,
+    PRIMARY KEY (day, rating)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rating_by_month (
+    month TEXT NOT NULL, rating INTEGER NOT NULL, reviews INTEGER NOT NULL,
+    PRIMARY KEY (month, rating)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS product_sentiment (
+    asin TEXT PRIMARY KEY,
+    reviews INTEGER NOT NULL,
+    rating_sum REAL NOT NULL,
+    positive INTEGER NOT NULL,
+    negative INTEGER NOT NULL,
+    neutral INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    weighted_score_sum REAL NOT NULL,
+    weight_sum REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def connect(db_path=AGGREGATES_DB):
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL lets the dashboard read while a preprocessing job is writing
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def has_review_columns(df):
+    return all(column in df.columns for column in REQUIRED_COLUMNS)
+
+
+def _review_keys(df):
+    base = df["asin"].astype(str) + "|" + df["unixReviewTime"].astype(str)
+    if "reviewerID" in df.columns:
+        raw = df["reviewerID"].fillna("").astype(str) + "|" + base
+    else:
+        # unixReviewTime has day resolution, so without a reviewer distinct reviews
+        # of a product on the same day are told apart by rating and text, and
+        # identical rows by their occurrence number
+        text_column = next((c for c in ("reviewText", "processed_text") if c in df.columns), None)
+        text = df[text_column].fillna("").astype(str) if text_column else pd.Series("", index=df.index)
+        raw = "|" + base + "|" + df["overall"].astype(str) + "|" + text
+        raw = raw + "#" + raw.groupby(raw).cumcount().astype(str)
+    return raw.map(lambda value: hashlib.sha1(value.encode("utf-8")).hexdigest())
+
+
+def _filter_unseen(conn, df):
+    keys = _review_keys(df)
+    df = df.assign(_review_key=keys).drop_duplicates("_review_key")
+    seen = set()
+    unique_keys = df["_review_key"].tolist()
+    for start in range(0, len(unique_keys), KEY_BATCH_SIZE):
+        batch = unique_keys[start:start + KEY_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        seen.update(
+            row[0] for row in conn.execute(f"SELECT review_key FROM seen_reviews WHERE review_key IN ({placeholders})", batch)
+        )
+    return df[~df["_review_key"].isin(seen)]
+
+
+def update_aggregates(df, db_path=AGGREGATES_DB, text_column="processed_text"):
+    """Fold a chunk of preprocessed reviews into the aggregates; returns rows added."""
+    if not has_review_columns(df) or df.empty:
+        return 0
+    conn = connect(db_path)
+    try:
+        with conn:
+            # Take the write lock before reading seen keys, so concurrent writers
+            # cannot both count the same reviews
+            conn.execute("BEGIN IMMEDIATE")
+            new = _filter_unseen(conn, df)
+            new = new[pd.to_numeric(new["overall"], errors="coerce").notna()]
+            new = new[pd.to_numeric(new["unixReviewTime"], errors="coerce").notna()]
+            if new.empty:
+                return 0
+
+            ratings = pd.to_numeric(new["overall"]).round().astype(int)
+            times = pd.to_datetime(pd.to_numeric(new["unixReviewTime"]), unit="s")
+            by_day = ratings.groupby([times.dt.strftime("%Y-%m-%d"), ratings]).size()
+            by_month = ratings.groupby([times.dt.strftime("%Y-%m"), ratings]).size()
+            conn.executemany(
+                "INSERT INTO rating_by_day (day, rating, reviews) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, rating) DO UPDATE SET reviews = reviews + excluded.reviews",
+                [(day, int(rating), int(count)) for (day, rating), count in by_day.items()],
+            )
+            conn.executemany(
+                "INSERT INTO rating_by_month (month, rating, reviews) VALUES (?, ?, ?) "
+                "ON CONFLICT(month, rating) DO UPDATE SET reviews = reviews + excluded.reviews",
+                [(month, int(rating), int(count)) for (month, rating), count in by_month.items()],
+            )
+
+            column = text_column if text_column in new.columns else "reviewText"
+            texts = new[column].fillna("").astype(str) if column in new.columns else pd.Series("", index=new.index)
+            scores = texts.map(lambda text: quick_sentiment(text)[1])
+            helpful = pd.to_numeric(new["helpful_yes"], errors="coerce").fillna(0) if "helpful_yes" in new.columns else 0
+            weights = 1 + helpful
+            per_review = pd.DataFrame({
+                "asin": new["asin"].astype(str),
+                "reviews": 1,
+                "rating_sum": pd.to_numeric(new["overall"]),
+                "positive": (scores > 0).astype(int),
+                "negative": (scores < 0).astype(int),
+                "neutral": (scores == 0).astype(int),
+                "score_sum": scores,
+                "weighted_score_sum": scores * weights,
+                "weight_sum": weights,
+            })
+            by_product = per_review.groupby("asin").sum()
+            conn.executemany(
+                "INSERT INTO product_sentiment (asin, reviews, rating_sum, positive, negative, neutral, "
+                "score_sum, weighted_score_sum, weight_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(asin) DO UPDATE SET reviews = reviews + excluded.reviews, "
+                "rating_sum = rating_sum + excluded.rating_sum, positive = positive + excluded.positive, "
+                "negative = negative + excluded.negative, neutral = neutral + excluded.neutral, "
+                "score_sum = score_sum + excluded.score_sum, "
+                "weighted_score_sum = weighted_score_sum + excluded.weighted_score_sum, "
+                "weight_sum = weight_sum + excluded.weight_sum",
+                [
+                    (asin, int(row.reviews), float(row.rating_sum), int(row.positive), int(row.negative),
+                     int(row.neutral), float(row.score_sum), float(row.weighted_score_sum), float(row.weight_sum))
+                    for asin, row in by_product.iterrows()
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen_reviews (review_key) VALUES (?)",
+                [(key,) for key in new["_review_key"]],
+            )
+            return len(new)
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Reads for the dashboard
+# -----------------------------
+def read_rating_distribution(period="month", db_path=AGGREGATES_DB):
+    """Reviews per period and star rating, pivoted to one column per rating."""
+    table, column = ("rating_by_day", "day") if period == "day" else ("rating_by_month", "month")
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(f"SELECT {column} AS period, rating, reviews FROM {table}", conn)
+    finally:
+        conn.close()
+    if df.empty:
+        return df
+    return df.pivot_table(index="period", columns="rating", values="reviews", fill_value=0).astype(int).sort_index()
+
+
+def read_product_sentiment(limit=20, order_by="reviews", db_path=AGGREGATES_DB):
+    """Per-product sentiment summary, most reviewed (or another column) first."""
+    order_columns = {"reviews", "avg_rating", "avg_sentiment", "weighted_sentiment"}
+    if order_by not in order_columns:
+        raise ValueError(f"order_by must be one of {sorted(order_columns)}")
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(
+            "SELECT asin, reviews, rating_sum / reviews AS avg_rating, positive, negative, neutral, "
+            "score_sum / reviews AS avg_sentiment, weighted_score_sum / weight_sum AS weighted_sentiment "
+            f"FROM product_sentiment ORDER BY {order_by} DESC LIMIT ?",
+            conn,
+            params=(int(limit),),
+        )
+    finally:
+        conn.close()
+
+
+def aggregates_version(db_path=AGGREGATES_DB):
+    """Latest mtime across the database and its WAL, for cache keys (0 if absent)."""
+    mtimes = [os.path.getmtime(path) for path in (db_path, db_path + "-wal") if os.path.exists(path)]
+    return max(mtimes, default=0.0)
+
+
+def main():
+    """Backfill the aggregates from a preprocessed CSV, chunk by chunk."""
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "preprocessed_reviews.csv")
+    print("=" * 60)
+    print("UPDATING REVIEW AGGREGATES")
+    print("=" * 60)
+    added = 0
+    for chunk in pd.read_csv(csv_path, chunksize=50_000):
+        added += update_aggregates(chunk)
+        print(f"Added {added} new reviews...")
+    print(f"Done. {added} new reviews folded into {AGGREGATES_DB}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Trainable sentiment classifier over preprocessed review text.
+
+CPU-only: hashed word/bigram features with TF-IDF weighting feed a logistic
+regression trained on the labelled ``Sentiment`` column of
+``data/preprocessed_sentiment_analysis.csv``. The hashing vectorizer holds no
+vocabulary, so memory does not grow with the corpus and inference needs no
+fitting pass.
+
+Each training run saves a new versioned artifact under ``data/models``
+(``sentiment-v<N>.joblib`` plus ``sentiment-v<N>.json`` metadata) and points
+``sentiment-latest.json`` at it. A process loads a given version once;
+``predict`` then scores texts in vectorized batches.
+
+Usage:
+    python sentiment_model.py train [labelled_csv]
+    python sentiment_model.py predict <csv> [output_csv]
+"""
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from itertools import islice
+
+import joblib
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MODELS_DIR = os.path.join(DATA_DIR, "models")
+LABELLED_CSV = os.path.join(DATA_DIR, "preprocessed_sentiment_analysis.csv")
+LATEST_POINTER = os.path.join(MODELS_DIR, "sentiment-latest.json")
+TEXT_COLUMN = "processed_text"
+LABEL_COLUMN = "Sentiment"
+PREDICT_BATCH_SIZE = 10_000
+
+
+def build_pipeline():
+    return Pipeline([
+        ("hash", HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False, norm=None)),
+        ("tfidf", TfidfTransformer(sublinear_tf=True)),
+        ("clf", LogisticRegression(max_iter=1000, C=10.0)),
+    ])
+
+
+def load_labelled(csv_path=LABELLED_CSV, text_column=TEXT_COLUMN, label_column=LABEL_COLUMN):
+    df = pd.read_csv(csv_path, usecols=[text_column, label_column])
+    df = df.dropna(subset=[label_column])
+    return df[text_column].fillna("").astype(str), df[label_column].astype(str).str.strip()
+
+
+def evaluate(model, texts, labels):
+    """Accuracy of ``model`` against ``labels``."""
+    predictions = predict(list(texts), model=model)
+    correct = sum(p == y for p, y in zip(predictions, labels))
+    return correct / len(labels) if len(labels) else 0.0
+
+
+def train(csv_path=LABELLED_CSV, test_size=0.25, random_state=42):
+    """Train on the labelled CSV, save a new versioned artifact and return its metadata.
+
+    Accuracy is measured on a stratified holdout; the saved model is then
+    refit on all labelled rows.
+    """
+    texts, labels = load_labelled(csv_path)
+    stratify = labels if labels.value_counts().min() >= 2 else None
+    x_train, x_test, y_train, y_test = train_test_split(
+        texts, labels, test_size=test_size, random_state=random_state, stratify=stratify
+    )
+    holdout_model = build_pipeline().fit(x_train, y_train)
+    holdout_accuracy = evaluate(holdout_model, x_test, y_test)
+
+    model = build_pipeline().fit(texts, labels)
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    version = _latest_version() + 1
+    artifact = os.path.join(MODELS_DIR, f"sentiment-v{version}.joblib")
+    meta = {
+        "version": version,
+        "artifact": os.path.basename(artifact),
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "training_data": os.path.basename(csv_path),
+        "samples": int(len(labels)),
+        "labels": sorted(labels.unique().tolist()),
+        "holdout_accuracy": holdout_accuracy,
+        "holdout_size": int(len(y_test)),
+    }
+    joblib.dump(model, artifact)
+    _write_json(os.path.join(MODELS_DIR, f"sentiment-v{version}.json"), meta)
+    # Point "latest" at the new version only once the artifact is fully written
+    _write_json(LATEST_POINTER, {"version": version})
+    return meta
+
+
+def _write_json(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _latest_version():
+    try:
+        with open(LATEST_POINTER, "r", encoding="utf-8") as f:
+            return int(json.load(f)["version"])
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(version=None):
+    """Load a model artifact once per process (latest version by default)."""
+    version = version or _latest_version()
+    if not version:
+        raise FileNotFoundError("No trained sentiment model; run: python sentiment_model.py train")
+    with _models_lock:
+        model = _models.get(version)
+        if model is None:
+            model = joblib.load(os.path.join(MODELS_DIR, f"sentiment-v{version}.joblib"))
+            _models[version] = model
+    return model
+
+
+def iter_predictions(texts, model=None, batch_size=PREDICT_BATCH_SIZE):
+    """Yield predicted labels for an iterable of texts, one vectorized batch at a time."""
+    model = model or load_model()
+    texts = iter(texts)
+    while True:
+        batch = [text if isinstance(text, str) else "" for text in islice(texts, batch_size)]
+        if not batch:
+            return
+        yield from model.predict(batch)
+
+
+def predict(texts, model=None, batch_size=PREDICT_BATCH_SIZE):
+    """Predicted labels for ``texts`` as a list."""
+    return list(iter_predictions(texts, model=model, batch_size=batch_size))
+
+
+def predict_csv(csv_path, output_file, text_column=TEXT_COLUMN, chunksize=50_000):
+    """Add a ``predicted_sentiment`` column to a preprocessed CSV, chunk by chunk."""
+    model = load_model()
+    first = True
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk["predicted_sentiment"] = predict(chunk[text_column], model=model)
+        chunk.to_csv(output_file, mode="w" if first else "a", header=first, index=False)
+        first = False
+        rows += len(chunk)
+    return rows
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "train"
+    if command == "train":
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else LABELLED_CSV
+        meta = train(csv_path)
+        print(f"Saved sentiment model v{meta['version']} ({meta['samples']} samples)")
+        print(f"Holdout accuracy: {meta['holdout_accuracy']:.3f} on {meta['holdout_size']} rows")
+    elif command == "predict" and len(sys.argv) > 2:
+        csv_path = sys.argv[2]
+        output_file = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(csv_path)[0] + "_predicted.csv"
+        rows = predict_csv(csv_path, output_file)
+        print(f"Scored {rows} rows -> {output_file}")
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
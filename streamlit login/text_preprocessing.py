@@ -2,8 +2,15 @@ import pandas as pd
 import numpy as np
 import re
 import warnings
+from itertools import islice
 warnings.filterwarnings('ignore')
 
+from dataset_stats import StatsAccumulator, compute_stats, write_stats
+from json_ingest import iter_json_chunks, detect_text_column
+from review_aggregates import has_review_columns, update_aggregates
+from corpus_store import build_corpus_store
+from preprocess_cache import PreprocessCache, cache_key, make_namespace
+
 # Import NLTK
 import nltk
 from nltk.corpus import stopwords
@@ -35,20 +42,89 @@ except:
     SPACY_AVAILABLE = False
     print("SpaCy not available, using NLTK only")
 
+# Only needed for POS-aware lemmatization without spaCy, so it is fetched on
+# first use rather than on import
+_tagger_ready = False
+
+
+def ensure_nltk_tagger():
+    global _tagger_ready
+    if _tagger_ready:
+        return
+    try:
+        nltk.data.find('taggers/averaged_perceptron_tagger_eng')
+    except LookupError:
+        nltk.download('averaged_perceptron_tagger_eng', quiet=True)
+    _tagger_ready = True
+
+
 # Initialize lemmatizer
 lemmatizer = WordNetLemmatizer()
 
 # Get stopwords
 stop_words = set(stopwords.words('english'))
 
+# Stages accepted by TextPreprocessingPipeline.iter_preprocess, in default order
+PIPELINE_STAGES = ('clean', 'tokenize', 'stopwords', 'lemmatize')
+TOKEN_STAGES = ('stopwords', 'lemmatize')
+
+# Bump when a stage's code changes, so cached results from older code are not reused
+PREPROCESS_VERSION = 1
+
+# chain: four WordNet lookups per token (v -> n -> a -> r)
+# wordnet_pos: one WordNet lookup with the POS tagged during tokenization
+# spacy: spaCy's own lemma from the tokenization pass (wordnet_pos without spaCy)
+LEMMATIZE_MODES = ('chain', 'wordnet_pos', 'spacy')
+
+
+def penn_to_wordnet(tag):
+    """Map a Penn Treebank tag to the WordNet POS used by WordNetLemmatizer."""
+    if tag.startswith('J'):
+        return 'a'
+    if tag.startswith('V'):
+        return 'v'
+    if tag.startswith('R'):
+        return 'r'
+    return 'n'
+
+
+def _as_text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+def _iter_batches(items, batch_size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
 class TextPreprocessingPipeline:
     """
     Text Preprocessing Pipeline for customer reviews
     Implements 5 stages: Load -> Clean -> Tokenize -> Remove Stopwords -> Lemmatize
+    
+    ``stages`` selects and orders the text stages used by iter_preprocess
+    (and so by process_dataset and the streaming methods); preprocess_text
+    always runs all of them. ``lemmatize_mode`` is one of LEMMATIZE_MODES.
+    With a PreprocessCache as ``cache``, results are looked up by text and
+    configuration before being computed.
     """
     
-    def __init__(self):
+    def __init__(self, stages=PIPELINE_STAGES, lemmatize_mode='chain', cache=None):
+        if lemmatize_mode not in LEMMATIZE_MODES:
+            raise ValueError(f"lemmatize_mode must be one of {LEMMATIZE_MODES}")
         self.processed_texts = []
+        self.lemmatize_mode = lemmatize_mode
+        if lemmatize_mode != 'chain' and not SPACY_AVAILABLE:
+            ensure_nltk_tagger()
+        self.stages = tuple(stages)
+        self._resolve_stages(self.stages)
+        self.cache = cache
+        self._namespaces = {}
         
     def step1_load_data(self, file_path):
         """Step 1: Load uploaded data"""
@@ -101,6 +177,15 @@ class TextPreprocessingPipeline:
         
         return tokens
     
+    def step3_tagged_tokenization(self, text):
+        """Step 3 keeping (token, Penn tag, spaCy lemma or None) for POS-aware lemmatization"""
+        if not text:
+            return []
+        
+        if SPACY_AVAILABLE:
+            return [(token.text, token.tag_, token.lemma_) for token in nlp(text)]
+        return [(word, tag, None) for word, tag in nltk.pos_tag(word_tokenize(text))]
+    
     def step4_remove_stopwords(self, tokens):
         """Step 4: Stopword Removal"""
         # Remove stopwords and keep only meaningful words
@@ -111,6 +196,10 @@ class TextPreprocessingPipeline:
         
         return filtered_tokens
     
+    def step4_remove_tagged_stopwords(self, tagged_tokens):
+        """Step 4 on tagged tokens, with the same rules as step4_remove_stopwords"""
+        return [item for item in tagged_tokens if item[0].lower() not in stop_words and len(item[0]) > 2]
+    
     def step5_lemmatization(self, tokens):
         """Step 5: Lemmatization"""
         lemmatized_tokens = []
@@ -124,13 +213,60 @@ class TextPreprocessingPipeline:
         
         return lemmatized_tokens
     
+    def step5_pos_lemmatization(self, tagged_tokens):
+        """Step 5 with at most one lookup per token, using tags from the tokenization pass"""
+        lemmatized_tokens = []
+        for token, tag, lemma in tagged_tokens:
+            if self.lemmatize_mode == 'spacy' and lemma:
+                lemmatized_tokens.append(lemma.lower())
+            else:
+                lemmatized_tokens.append(lemmatizer.lemmatize(token.lower(), pos=penn_to_wordnet(tag)))
+        
+        return lemmatized_tokens
+    
+    def _cache_namespace(self, resolved_stages):
+        """Cache namespace for everything that affects the output of these stages."""
+        namespace = self._namespaces.get(tuple(resolved_stages))
+        if namespace is None:
+            namespace = make_namespace({
+                "version": PREPROCESS_VERSION,
+                "stages": list(resolved_stages),
+                "lemmatize_mode": self.lemmatize_mode,
+                "spacy": nlp.meta.get("version") if SPACY_AVAILABLE else None,
+                "nltk": nltk.__version__,
+                "stopwords": sorted(stop_words),
+            })
+            self._namespaces[tuple(resolved_stages)] = namespace
+        return namespace
+    
     def preprocess_text(self, text, return_as_list=False):
         """
         Complete preprocessing pipeline for a single text
         """
+        if self.cache is None:
+            tokens = self._preprocess_tokens(text)
+        else:
+            key = cache_key(self._cache_namespace(self._resolve_stages(PIPELINE_STAGES)[0]), _as_text(text))
+            tokens = self.cache.get(key)
+            if tokens is None:
+                tokens = self._preprocess_tokens(text)
+                self.cache.put(key, tokens)
+        
+        if return_as_list:
+            return tokens
+        else:
+            return ' '.join(tokens)
+    
+    def _preprocess_tokens(self, text):
         # Step 2: Clean and normalize
         cleaned_text = self.step2_clean_normalize(text)
         
+        if self.lemmatize_mode != 'chain':
+            # Steps 3-5 on tagged tokens, so lemmatization reuses the tokenization pass
+            tagged_tokens = self.step3_tagged_tokenization(cleaned_text)
+            tagged_tokens = self.step4_remove_tagged_stopwords(tagged_tokens)
+            return self.step5_pos_lemmatization(tagged_tokens)
+        
         # Step 3: Tokenize
         tokens = self.step3_tokenization(cleaned_text)
         
@@ -138,12 +274,122 @@ class TextPreprocessingPipeline:
         filtered_tokens = self.step4_remove_stopwords(tokens)
         
         # Step 5: Lemmatize
-        lemmatized_tokens = self.step5_lemmatization(filtered_tokens)
+        return self.step5_lemmatization(filtered_tokens)
+    
+    def _resolve_stages(self, stages):
+        """Validate a stage order; token stages without 'tokenize' split on whitespace."""
+        unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage(s) {unknown}; expected some of {PIPELINE_STAGES}")
+        if len(set(stages)) != len(stages):
+            raise ValueError(f"Pipeline stages must not repeat: {stages}")
+        resolved = []
+        tokenized = False
+        for stage in stages:
+            if stage == 'clean' and tokenized:
+                raise ValueError("'clean' works on raw text and must come before tokenization")
+            if stage in TOKEN_STAGES and not tokenized:
+                resolved.append('split')
+                tokenized = True
+            if stage == 'tokenize':
+                tokenized = True
+                if self.lemmatize_mode != 'chain' and 'lemmatize' in stages:
+                    # Keep tags (and spaCy lemmas) for the lemmatize stage
+                    stage = 'tag'
+            resolved.append(stage)
+        return resolved, tokenized
+    
+    def _stage_clean(self, batches):
+        for batch in batches:
+            yield [self.step2_clean_normalize(text) for text in batch]
+    
+    def _stage_tokenize(self, batches):
+        for batch in batches:
+            texts = [_as_text(text) for text in batch]
+            if SPACY_AVAILABLE:
+                # Tokenizer only: the same tokens as nlp(text), one pass per batch
+                yield [[token.text for token in doc] for doc in nlp.tokenizer.pipe(texts)]
+            else:
+                yield [word_tokenize(text) if text else [] for text in texts]
+    
+    def _stage_tag(self, batches):
+        for batch in batches:
+            texts = [_as_text(text) for text in batch]
+            if SPACY_AVAILABLE:
+                yield [[(token.text, token.tag_, token.lemma_) for token in doc] for doc in nlp.pipe(texts)]
+            else:
+                sentences = nltk.pos_tag_sents([word_tokenize(text) if text else [] for text in texts])
+                yield [[(word, tag, None) for word, tag in sentence] for sentence in sentences]
+    
+    def _stage_split(self, batches):
+        for batch in batches:
+            yield [_as_text(text).split() for text in batch]
+    
+    def _stage_stopwords(self, batches):
+        for batch in batches:
+            yield [
+                self.step4_remove_tagged_stopwords(tokens) if tokens and isinstance(tokens[0], tuple)
+                else self.step4_remove_stopwords(tokens)
+                for tokens in batch
+            ]
+    
+    def _stage_lemmatize(self, batches):
+        for batch in batches:
+            # Tokens carry tags only when they came from the 'tag' stage
+            yield [
+                self.step5_pos_lemmatization(tokens) if tokens and isinstance(tokens[0], tuple)
+                else self.step5_lemmatization(tokens)
+                for tokens in batch
+            ]
+    
+    def iter_preprocess(self, texts, stages=None, batch_size=1000, return_as_list=False):
+        """
+        Lazily preprocess an iterable of texts, yielding one result per text.
         
-        if return_as_list:
-            return lemmatized_tokens
+        Each stage is a generator over batches of ``batch_size`` texts, so only
+        one batch per stage is in flight and consumers (a sentiment scorer, a
+        keyword counter, a CSV writer) can run on the stream without the
+        corpus ever being held in memory. ``stages`` overrides the pipeline's
+        configured stage order, e.g. ('clean', 'tokenize', 'lemmatize').
+        With a cache, each batch is looked up in one query and only the
+        misses go through the stages.
+        """
+        resolved, tokenized = self._resolve_stages(tuple(self.stages if stages is None else stages))
+        if self.cache is None:
+            results = self._iter_stages(texts, resolved, batch_size)
         else:
-            return ' '.join(lemmatized_tokens)
+            results = self._iter_cached(texts, resolved, batch_size)
+        for item in results:
+            if not tokenized:
+                item = _as_text(item)
+                yield item.split() if return_as_list else item
+            else:
+                yield item if return_as_list else ' '.join(item)
+    
+    def _iter_stages(self, texts, resolved, batch_size):
+        stream = _iter_batches(texts, batch_size)
+        for stage in resolved:
+            stream = getattr(self, f'_stage_{stage}')(stream)
+        for batch in stream:
+            yield from batch
+    
+    def _iter_cached(self, texts, resolved, batch_size):
+        namespace = self._cache_namespace(resolved)
+        for batch in _iter_batches(texts, batch_size):
+            texts_by_key = {}
+            keys = []
+            for text in batch:
+                key = cache_key(namespace, _as_text(text))
+                texts_by_key.setdefault(key, text)
+                keys.append(key)
+            found = self.cache.get_many(keys)
+            missing = [key for key in texts_by_key if key not in found]
+            if missing:
+                computed = list(self._iter_stages((texts_by_key[key] for key in missing), resolved, batch_size))
+                found.update(zip(missing, computed))
+                self.cache.put_many(zip(missing, computed))
+            for key in keys:
+                yield found[key]
     
     def process_dataset(self, df, text_column='reviewText'):
         """
@@ -163,11 +409,10 @@ class TextPreprocessingPipeline:
         
         # Process each text
         processed_texts = []
-        for idx, text in enumerate(df[text_column], 1):
+        for idx, processed in enumerate(self.iter_preprocess(df[text_column]), 1):
             if idx % 100 == 0:
                 print(f"Processed {idx}/{total_rows} texts...")
             
-            processed = self.preprocess_text(text)
             processed_texts.append(processed)
         
         # Add processed column to dataframe
@@ -177,6 +422,65 @@ class TextPreprocessingPipeline:
         
         return df
     
+    def process_chunks(self, chunks, output_file, text_column=None, source='input'):
+        """
+        Process an iterable of DataFrame chunks, appending each to a CSV.
+        Only one chunk is held in memory at a time.
+        """
+        columns = None
+        stats = None
+        total_rows = 0
+        for chunk in chunks:
+            if columns is None:
+                text_column = text_column or detect_text_column(chunk.columns)
+                if text_column is None or text_column not in chunk.columns:
+                    print(f"Error: no review text column found in {source}")
+                    return None
+                # Later records may have extra/missing keys; keep the CSV layout fixed
+                columns = [c for c in chunk.columns if c != 'processed_text']
+                stats = StatsAccumulator(text_column)
+            chunk = chunk.reindex(columns=columns)
+            chunk['processed_text'] = list(self.iter_preprocess(chunk[text_column]))
+            chunk.to_csv(output_file, mode='w' if total_rows == 0 else 'a', header=total_rows == 0, index=False)
+            stats.update(chunk)
+            if has_review_columns(chunk):
+                # Fold the new chunk into the aggregate views
+                update_aggregates(chunk)
+            total_rows += len(chunk)
+            print(f"Processed {total_rows} texts...")
+        
+        if columns is None:
+            print(f"Error: no records found in {source}")
+            return None
+        
+        stats_file = write_stats(output_file, stats.result())
+        print(f"\nProcessing complete! {total_rows} texts processed.")
+        print(f"Results saved to: {output_file}")
+        print(f"Statistics saved to: {stats_file}")
+        return output_file
+    
+    def process_json_stream(self, file_path, output_file, text_column=None, chunksize=1000):
+        """
+        Process a JSON array or NDJSON file chunk by chunk, appending to a CSV
+        """
+        print("\n" + "=" * 60)
+        print("STREAMING JSON THROUGH PIPELINE")
+        print("=" * 60)
+        
+        chunks = iter_json_chunks(file_path, chunksize=chunksize)
+        return self.process_chunks(chunks, output_file, text_column=text_column, source=file_path)
+    
+    def process_csv_stream(self, file_path, output_file, text_column=None, chunksize=1000):
+        """
+        Process a CSV file chunk by chunk, appending to a CSV
+        """
+        print("\n" + "=" * 60)
+        print("STREAMING CSV THROUGH PIPELINE")
+        print("=" * 60)
+        
+        chunks = pd.read_csv(file_path, chunksize=chunksize)
+        return self.process_chunks(chunks, output_file, text_column=text_column, source=file_path)
+    
     def save_results(self, df, output_file='data/preprocessed_reviews.csv'):
         """
         Save preprocessed results to CSV
@@ -191,6 +495,17 @@ class TextPreprocessingPipeline:
             print(f"Results saved to: {output_file}")
             print(f"Total rows saved: {len(df)}")
             
+            # Precompute full-dataset statistics for the frontend
+            stats_file = write_stats(output_file, compute_stats(df, text_column='reviewText'))
+            print(f"Statistics saved to: {stats_file}")
+            
+            if has_review_columns(df):
+                added = update_aggregates(df)
+                print(f"Aggregates updated with {added} new reviews")
+            
+            # Memory-mapped copy shared by the frontend and backend workers
+            print(f"Corpus store saved to: {build_corpus_store(output_file)}")
+            
             # Show sample results
             print("\nSample preprocessed texts:")
             sample_df = df[['reviewText', 'processed_text']].head(10)
@@ -212,8 +527,8 @@ def main():
     print("Review Sense - Milestone 2: Text Processing")
     print("=" * 60)
     
-    # Initialize pipeline
-    pipeline = TextPreprocessingPipeline()
+    # Initialize pipeline; results are reused across runs and scripts
+    pipeline = TextPreprocessingPipeline(cache=PreprocessCache())
     
     # Step 1: Load data
     file_path = 'data/amazon_reviews.csv'
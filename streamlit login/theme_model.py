@@ -0,0 +1,252 @@
+"""Scalable theme extraction over the preprocessed review corpus.
+
+Reviews are hashed into a fixed-size feature space (no vocabulary to grow)
+and clustered with mini-batch k-means, trained incrementally with
+``partial_fit`` over streamed chunks of ``processed_text``. Memory is bounded
+by ``n_themes x n_features`` plus one representative term per hash bucket,
+and runtime is linear in the number of reviews. When several words share a
+bucket, a weighted majority vote over document counts keeps the most frequent
+one, so a rare word cannot stand in for a common word in the theme terms.
+
+Each theme is described by the terms with the highest idf-weighted centroid
+value. The fitted state is saved to ``data/models/themes.joblib`` and can be
+updated with more chunks later, or used to assign themes to new reviews in
+batches.
+
+Usage:
+    python theme_model.py train [preprocessed_csv] [n_themes] [epochs]
+    python theme_model.py update <preprocessed_csv> [epochs]
+    python theme_model.py assign <preprocessed_csv> [output_csv]
+    python theme_model.py show
+    python theme_model.py verify [preprocessed_csv]
+"""
+import os
+import sys
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+THEMES_PATH = os.path.join(DATA_DIR, "models", "themes.joblib")
+TEXT_COLUMN = "processed_text"
+CHUNK_SIZE = 10_000
+
+
+class ThemeExtractor:
+    def __init__(self, n_themes=10, n_features=2 ** 17, random_state=42):
+        self.n_themes = n_themes
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm="l2", token_pattern=r"(?u)\b\w\w+\b"
+        )
+        self.kmeans = MiniBatchKMeans(n_clusters=n_themes, random_state=random_state, n_init=3, batch_size=1024)
+        # Hash bucket -> its most frequent term, so centroids can be read back as words
+        self.bucket_terms = {}
+        # Majority-vote count backing each bucket's term
+        self.bucket_term_count = np.zeros(n_features, dtype=np.int64)
+        self.theme_sizes = np.zeros(n_themes, dtype=np.int64)
+        # Documents containing each bucket, to favour distinctive terms over common ones
+        self.bucket_doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.documents_seen = 0
+        self._pending = []
+
+    @staticmethod
+    def _clean(texts):
+        return [text for text in (t if isinstance(t, str) else "" for t in texts) if text.strip()]
+
+    def _remember_terms(self, texts):
+        # Weighted Boyer-Moore vote: a term in more than half of its bucket's
+        # documents ends up as the bucket's label, whatever the chunk order
+        analyzer = self.vectorizer.build_analyzer()
+        buckets = self.bucket_terms
+        counts = self.bucket_term_count
+        doc_freq = Counter()
+        for text in texts:
+            doc_freq.update(set(analyzer(text)))
+        for term, freq in sorted(doc_freq.items(), key=lambda item: (-item[1], item[0])):
+            bucket = self._bucket(term)
+            if buckets.get(bucket) == term:
+                counts[bucket] += freq
+            elif freq > counts[bucket]:
+                buckets[bucket] = term
+                counts[bucket] = freq - counts[bucket]
+            else:
+                counts[bucket] -= freq
+
+    def _bucket(self, term):
+        # Same bucket HashingVectorizer assigns to ``term``
+        return abs(murmurhash3_32(term, seed=0)) % self.n_features
+
+    def partial_fit(self, texts, count=True):
+        """Update the themes with one chunk of preprocessed texts.
+
+        The chunk is fed to k-means in ``batch_size`` slices, one update step
+        each. ``count`` adds the chunk to the theme sizes and term statistics;
+        extra epochs over the same data pass False.
+        """
+        texts = self._clean(texts)
+        fitted = hasattr(self.kmeans, "cluster_centers_")
+        # k-means needs at least n_themes samples in its first batch
+        if not fitted and len(self._pending) + len(texts) < self.n_themes:
+            self._pending.extend(texts)
+            return self
+        texts, self._pending = self._pending + texts, []
+        if not texts:
+            return self
+        features = self.vectorizer.transform(texts)
+        step = max(self.kmeans.batch_size, self.n_themes)
+        for start in range(0, features.shape[0], step):
+            batch = features[start:start + step]
+            if not fitted and batch.shape[0] < self.n_themes:
+                break
+            self.kmeans.partial_fit(batch)
+            fitted = True
+        if count:
+            self.theme_sizes += np.bincount(self.kmeans.predict(features), minlength=self.n_themes)
+            self.bucket_doc_freq += np.bincount(features.indices, minlength=self.n_features)
+            self.documents_seen += len(texts)
+            self._remember_terms(texts)
+        return self
+
+    def assign(self, texts):
+        """Theme id for each text (-1 for empty texts), vectorized per batch."""
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        result = np.full(len(texts), -1, dtype=np.int64)
+        keep = [i for i, text in enumerate(texts) if text.strip()]
+        if keep:
+            result[keep] = self.kmeans.predict(self.vectorizer.transform([texts[i] for i in keep]))
+        return result
+
+    def top_terms(self, n_terms=8):
+        """Most characteristic terms for each theme."""
+        idf = np.log((1 + self.documents_seen) / (1 + self.bucket_doc_freq)) + 1
+        themes = []
+        for center in self.kmeans.cluster_centers_:
+            weights = center * idf
+            order = np.argsort(weights)[::-1]
+            terms = []
+            for bucket in order:
+                if weights[bucket] <= 0 or len(terms) >= n_terms:
+                    break
+                term = self.bucket_terms.get(int(bucket))
+                if term:
+                    terms.append(term)
+            themes.append(terms)
+        return themes
+
+    def save(self, path=THEMES_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def load(path=THEMES_PATH):
+        extractor = joblib.load(path)
+        if not hasattr(extractor, "bucket_term_count"):
+            # Saved before bucket labels were voted on; any later term may replace them
+            extractor.bucket_term_count = np.zeros(extractor.n_features, dtype=np.int64)
+        return extractor
+
+
+def train_from_csv(csv_path, n_themes=10, text_column=TEXT_COLUMN, chunksize=CHUNK_SIZE, extractor=None, epochs=3):
+    """Stream a preprocessed CSV through ``partial_fit``, one chunk at a time, ``epochs`` times.
+
+    Theme sizes and term statistics are counted on the last pass only.
+    """
+    extractor = extractor or ThemeExtractor(n_themes=n_themes)
+    for epoch in range(1, epochs + 1):
+        for chunk in pd.read_csv(csv_path, usecols=[text_column], chunksize=chunksize):
+            extractor.partial_fit(chunk[text_column], count=epoch == epochs)
+        print(f"Epoch {epoch}/{epochs}: {extractor.kmeans.n_steps_} k-means steps")
+    print(f"Trained on {extractor.documents_seen} reviews")
+    return extractor
+
+
+def assign_csv(csv_path, output_file, extractor, text_column=TEXT_COLUMN, chunksize=CHUNK_SIZE):
+    """Add a ``theme`` column to a preprocessed CSV, chunk by chunk."""
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk["theme"] = extractor.assign(chunk[text_column])
+        chunk.to_csv(output_file, mode="w" if rows == 0 else "a", header=rows == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def verify_top_terms(extractor, csv_path, text_column=TEXT_COLUMN, chunksize=CHUNK_SIZE):
+    """Compare the theme terms with an exact vocabulary count of ``csv_path``.
+
+    Returns [(theme_id, labelled_term, most_frequent_term)] for every theme
+    term whose bucket is not labelled with its most frequent word.
+    """
+    analyzer = extractor.vectorizer.build_analyzer()
+    doc_freq = Counter()
+    for chunk in pd.read_csv(csv_path, usecols=[text_column], chunksize=chunksize):
+        for text in extractor._clean(chunk[text_column]):
+            doc_freq.update(set(analyzer(text)))
+    best = {}
+    for term, freq in doc_freq.items():
+        bucket = extractor._bucket(term)
+        if bucket not in best or (freq, term) > (doc_freq[best[bucket]], best[bucket]):
+            best[bucket] = term
+    mismatches = []
+    for theme_id, terms in enumerate(extractor.top_terms()):
+        for term in terms:
+            expected = best.get(extractor._bucket(term))
+            if expected is not None and doc_freq[expected] > doc_freq[term]:
+                mismatches.append((theme_id, term, expected))
+    return mismatches
+
+
+def print_themes(extractor):
+    for theme_id, (terms, size) in enumerate(zip(extractor.top_terms(), extractor.theme_sizes)):
+        print(f"Theme {theme_id:2d} ({size} reviews): {', '.join(terms)}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    print("=" * 60)
+    print("THEME EXTRACTION")
+    print("=" * 60)
+    if command == "train":
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(DATA_DIR, "preprocessed_reviews.csv")
+        n_themes = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+        epochs = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+        extractor = train_from_csv(csv_path, n_themes=n_themes, epochs=epochs)
+        print(f"Saved themes to: {extractor.save()}")
+        print_themes(extractor)
+    elif command == "update" and len(sys.argv) > 2:
+        epochs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        extractor = train_from_csv(sys.argv[2], extractor=ThemeExtractor.load(), epochs=epochs)
+        print(f"Saved themes to: {extractor.save()}")
+        print_themes(extractor)
+    elif command == "assign" and len(sys.argv) > 2:
+        csv_path = sys.argv[2]
+        output_file = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(csv_path)[0] + "_themes.csv"
+        rows = assign_csv(csv_path, output_file, ThemeExtractor.load())
+        print(f"Assigned themes to {rows} rows -> {output_file}")
+    elif command == "show":
+        print_themes(ThemeExtractor.load())
+    elif command == "verify":
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(DATA_DIR, "preprocessed_reviews.csv")
+        mismatches = verify_top_terms(ThemeExtractor.load(), csv_path)
+        for theme_id, term, expected in mismatches:
+            print(f"Theme {theme_id:2d}: '{term}' labels a bucket whose most frequent term is '{expected}'")
+        print("Theme terms match the exact vocabulary count" if not mismatches else f"{len(mismatches)} mismatched terms")
+        sys.exit(1 if mismatches else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    # Run through the module so saved state pickles theme_model.ThemeExtractor, not __main__'s
+    from theme_model import main as theme_main
+
+    theme_main()